@@ -0,0 +1,77 @@
+import hashlib
+import json
+from fastapi import Request, Response
+
+# max-age (segundos) por tipo de endpoint
+CATALOG_MAX_AGE = 60
+CATEGORIES_MAX_AGE = 300
+STATS_MAX_AGE = 300
+STATIC_MAX_AGE = 3600
+
+# codificações do CompressionMiddleware, acrescentadas ao ETag da resposta comprimida
+ENCODED_ETAG_SUFFIXES = ("gzip", "br")
+
+
+def content_version(data):
+    """Identificador estável de um conteúdo JSON (igual em todos os workers)"""
+    raw = json.dumps(data, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+def make_etag(version, request: Request):
+    """ETag forte: versão dos dados + rota + query string"""
+    raw = f"{version}|{request.url.path}|{request.url.query}".encode()
+    return '"' + hashlib.blake2b(raw, digest_size=12).hexdigest() + '"'
+
+
+def encoded_etag(etag, encoding):
+    """
+    ETag de uma representação comprimida ("abc" -> "abc-gzip").
+
+    Um ETag forte identifica os bytes enviados, então gzip e brotli precisam
+    de ETags diferentes do corpo sem compressão.
+    """
+    if not etag.endswith('"'):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def _strip_encoding(etag):
+    for encoding in ENCODED_ETAG_SUFFIXES:
+        if etag.endswith(f'-{encoding}"'):
+            return etag[:-len(encoding) - 2] + '"'
+    return etag
+
+
+def matching_etag(if_none_match, etag):
+    """Valor do If-None-Match que corresponde a `etag` (ignorando o sufixo de compressão), ou None"""
+    if not if_none_match:
+        return None
+    for candidate in (value.strip() for value in if_none_match.split(",")):
+        # If-None-Match usa comparação fraca: W/"x" casa com "x"
+        if candidate == "*" or _strip_encoding(candidate.removeprefix("W/")) == etag:
+            return candidate
+    return None
+
+
+def etag_matches(if_none_match, etag):
+    return matching_etag(if_none_match, etag) is not None
+
+
+def conditional_get(request: Request, response: Response, version, max_age):
+    """
+    Aplica ETag e Cache-Control à resposta.
+
+    Devolve uma resposta 304 quando o If-None-Match do cliente corresponde à
+    versão atual; o handler deve retorná-la antes de montar o corpo.
+    """
+    etag = make_etag(version, request)
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched is not None:
+        # o 304 repete o ETag da representação que o cliente tem (comprimida ou não)
+        if matched != "*":
+            headers["ETag"] = matched.removeprefix("W/")
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
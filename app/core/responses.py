@@ -0,0 +1,141 @@
+import gzip
+import json
+import os
+from decimal import Decimal
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers, MutableHeaders
+from app.core.http_cache import encoded_etag
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# corpo mínimo (bytes) para comprimir respostas JSON
+COMPRESSION_MIN_SIZE = int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", "1024"))
+
+# cabeçalhos definidos no `response` injetado que devem ir para a resposta final
+FORWARDED_HEADERS = ("etag", "cache-control")
+
+
+def json_default(value):
+    """Converte Decimal (DynamoDB) e tipos NumPy para tipos JSON"""
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+if orjson is not None:
+    def dumps(content):
+        """Serializa para bytes JSON (orjson quando disponível)"""
+        return orjson.dumps(
+            content,
+            default=json_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+else:
+    def dumps(content):
+        """Serializa para bytes JSON (orjson quando disponível)"""
+        return json.dumps(content, default=json_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse que entende Decimal e usa orjson quando instalado"""
+
+    def render(self, content):
+        return dumps(content)
+
+
+def _negotiate_encoding(accept_encoding):
+    accepted = {value.split(";")[0].strip().lower() for value in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+def _compress(body, encoding):
+    if encoding == "br":
+        return brotli.compress(body, quality=4)
+    return gzip.compress(body, compresslevel=5)
+
+
+class CompressionMiddleware:
+    """
+    Comprime respostas JSON acima de COMPRESSION_MIN_SIZE bytes.
+
+    Vale para todas as rotas, inclusive as que usam o FastJSONResponse
+    padrão: brotli ou gzip conforme o Accept-Encoding, com o ETag forte
+    ganhando o sufixo da codificação ("...-gzip"). Respostas em streaming
+    (corpo em mais de uma mensagem, como o export) e as que já têm
+    Content-Encoding passam sem alteração.
+    """
+
+    def __init__(self, app, minimum_size=COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = _negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # segurado até o corpo chegar, para saber o tamanho
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+            pending, start = start, None
+            headers = MutableHeaders(raw=pending["headers"])
+            body = message.get("body", b"")
+            if (
+                message["type"] != "http.response.body"
+                or message.get("more_body", False)
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith("application/json")
+                or len(body) < self.minimum_size
+            ):
+                await send(pending)
+                await send(message)
+                return
+            headers.add_vary_header("Accept-Encoding")
+            if encoding:
+                body = _compress(body, encoding)
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+            await send(pending)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def fast_json(content, response: Response = None, status_code=200):
+    """
+    Monta a resposta JSON sem passar pelo jsonable_encoder do FastAPI.
+
+    Os itens do DynamoDB são serializados direto (Decimal incluso); a
+    compressão fica com o `CompressionMiddleware`. ETag/Cache-Control
+    definidos em `response` são mantidos.
+    """
+    body = dumps(content)
+    headers = {}
+    if response is not None:
+        headers = {name: response.headers[name] for name in FORWARDED_HEADERS if name in response.headers}
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
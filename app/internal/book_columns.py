@@ -0,0 +1,182 @@
+import sys
+import json
+import logging
+import threading
+import numpy as np
+from app.core.http_cache import content_version
+from app.internal.search_index import TitleLookup
+from app.internal.stats import parse_price
+
+logger = logging.getLogger(__name__)
+
+BOOKS_JSON_PATH = "books.json"
+
+RATING_VALUES = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+RATING_NAMES = {value: name for name, value in RATING_VALUES.items()}
+
+
+def parse_rating(value):
+    """Converte rating ("Three" ou 3) para inteiro; 0 quando desconhecido"""
+    if isinstance(value, str):
+        return RATING_VALUES.get(value, 0)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+class BookColumns:
+    """
+    Catálogo em colunas tipadas, na mesma ordem das linhas de entrada.
+
+    Preço e rating ficam em arrays NumPy, categoria e disponibilidade como
+    códigos inteiros e títulos como strings internadas. A conversão de
+    "£51.77" e "Three" é feita uma única vez, na construção.
+
+    Aceita tanto o books.json quanto os itens do DynamoDB, e pode ser usado
+    como índice de `CatalogSnapshot` (ver `upsert`). Quem lê várias colunas
+    fora do event loop deve segurar `lock`, que o `upsert` também usa.
+    """
+
+    def __init__(self, books, version=None):
+        books = list(books)
+        self.version = version
+        self.categories = []
+        self.availabilities = []
+        self.currency = "£"
+        self._category_code = {}
+        self._availability_code = {}
+        self._rows = None
+        self._title_lookup = None
+        self.lock = threading.RLock()
+        # cada coluna é montada numa lista e convertida de uma vez para o array
+        self.ids = np.array([int(b.get("id", row + 1)) for row, b in enumerate(books)], dtype=np.int64)
+        self.prices = np.array([parse_price(b["price"]) for b in books], dtype=np.float64)
+        self.ratings = np.array([parse_rating(b.get("rating")) for b in books], dtype=np.int8)
+        self.category_codes = np.array(
+            [self._code(self._category_code, self.categories, b.get("category")) for b in books],
+            dtype=np.int16
+        )
+        self.availability_codes = np.array(
+            [self._code(self._availability_code, self.availabilities, b.get("availability")) for b in books],
+            dtype=np.int16
+        )
+        self.titles = [sys.intern(b["title"]) for b in books]
+        if books and isinstance(books[0]["price"], str):
+            self.currency = books[0]["price"].rstrip("0123456789.,").strip()
+
+    @staticmethod
+    def _code(codes, names, value):
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(names)
+            names.append(value)
+        return code
+
+    def _fill(self, row, book):
+        self.ids[row] = int(book.get("id", row + 1))
+        self.prices[row] = parse_price(book["price"])
+        self.ratings[row] = parse_rating(book.get("rating"))
+        self.category_codes[row] = self._code(self._category_code, self.categories, book.get("category"))
+        self.availability_codes[row] = self._code(
+            self._availability_code, self.availabilities, book.get("availability")
+        )
+        title = sys.intern(book["title"])
+        if row == len(self.titles):
+            self.titles.append(title)
+        else:
+            self.titles[row] = title
+        if self._title_lookup is not None:
+            self._title_lookup.set(row, title)
+
+    def title_lookup(self):
+        """Índice título -> linha, montado na primeira consulta e mantido pelo upsert"""
+        if self._title_lookup is None:
+            self._title_lookup = TitleLookup(self.titles)
+        return self._title_lookup
+
+    def _id_rows(self):
+        # mapa id -> linha, montado na primeira consulta
+        if self._rows is None:
+            self._rows = {book_id: row for row, book_id in enumerate(self.ids.tolist())}
+        return self._rows
+
+    def row_of(self, book_id):
+        """Linha de um id"""
+        return self._id_rows().get(book_id)
+
+    def rows_of(self, book_ids):
+        """Linhas de vários ids (array); -1 para ids fora do catálogo"""
+        rows = self._id_rows()
+        return np.array([rows.get(book_id, -1) for book_id in np.asarray(book_ids).tolist()], dtype=np.intp)
+
+    def upsert(self, book, previous=None):
+        """
+        Atualiza a linha do livro ou acrescenta uma nova.
+
+        Acrescentar copia os arrays (O(n)), aceitável porque escritas são
+        raras perto das leituras.
+        """
+        with self.lock:
+            row = self.row_of(int(book["id"])) if previous is not None else None
+            if row is None:
+                row = len(self.titles)
+                for name in ("ids", "prices", "ratings", "category_codes", "availability_codes"):
+                    column = getattr(self, name)
+                    setattr(self, name, np.append(column, np.zeros(1, dtype=column.dtype)))
+                if self._rows is not None:
+                    self._rows[int(book["id"])] = row
+            self._fill(row, book)
+
+    def __len__(self):
+        return len(self.titles)
+
+    def category(self, row):
+        return self.categories[self.category_codes[row]]
+
+    def price_label(self, row):
+        """Preço no formato original do catálogo ("£51.77")"""
+        return f"{self.currency}{self.prices[row]:.2f}"
+
+    def rating_name(self, row):
+        return RATING_NAMES.get(int(self.ratings[row]), "")
+
+    def book(self, row):
+        """Reconstrói o livro da linha `row` no formato do books.json"""
+        return {
+            "id": int(self.ids[row]),
+            "title": self.titles[row],
+            "price": self.price_label(row),
+            "rating": self.rating_name(row),
+            "availability": self.availabilities[self.availability_codes[row]],
+            "category": self.category(row),
+        }
+
+
+def load_book_columns(path=BOOKS_JSON_PATH):
+    """Lê o books.json e devolve as colunas (vazias se o arquivo faltar ou estiver inválido)"""
+    try:
+        with open(path, "r") as f:
+            books = json.load(f)
+        logger.info(f"{path} carregado com sucesso")
+    except FileNotFoundError:
+        logger.error(f"Arquivo {path} não encontrado")
+        books = []
+    except json.JSONDecodeError:
+        logger.error(f"Erro ao decodificar {path}")
+        books = []
+    return BookColumns(books, version=content_version(books))
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_book_columns():
+    """Colunas do books.json compartilhadas por todos os routers do processo"""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                _shared = load_book_columns()
+    return _shared
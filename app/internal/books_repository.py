@@ -0,0 +1,138 @@
+import os
+import time
+import logging
+from boto3.dynamodb.conditions import Attr, Key
+from botocore.exceptions import ClientError
+from app.internal.projection import projection_params
+from app.internal.dynamo import (
+    SCAN_SEGMENTS, batch_get_chunk, batch_write_chunk, iter_query, parallel_scan
+)
+
+logger = logging.getLogger(__name__)
+
+# GSI com partition key `category` (S) e sort key `rating` (N); ver create_tables.py
+CATEGORY_INDEX = os.getenv("BOOKS_CATEGORY_INDEX", "category-rating-index")
+# depois de o índice faltar, intervalo até a próxima tentativa de Query nele
+INDEX_RETRY_SECONDS = float(os.getenv("BOOKS_INDEX_RETRY_SECONDS", "300"))
+
+
+class QueryPlan:
+    """Operação escolhida pelo planner e os parâmetros enviados ao DynamoDB"""
+
+    def __init__(self, operation, params):
+        self.operation = operation
+        self.params = params
+
+    def __repr__(self):
+        index = self.params.get('IndexName')
+        return f"QueryPlan({self.operation}{' on ' + index if index else ''})"
+
+
+class BooksRepository:
+    """
+    Acesso à tabela Books.
+
+    `find` escolhe entre Query no GSI de categoria e Scan: sempre que a
+    categoria é conhecida a leitura fica restrita à partição dela (e à faixa
+    de rating, se pedida); o Scan com FilterExpression só é usado quando não
+    há categoria ou o índice não existe na tabela.
+    """
+
+    def __init__(self, table, category_index=CATEGORY_INDEX, scan_segments=SCAN_SEGMENTS,
+                 index_retry_seconds=INDEX_RETRY_SECONDS):
+        self.table = table
+        self.category_index = category_index
+        self.scan_segments = scan_segments
+        self._index_retry_seconds = index_retry_seconds
+        self._index_missing_at = None
+
+    def _index_available(self):
+        # o índice é testado de novo a cada INDEX_RETRY_SECONDS, para voltar ao Query quando for criado
+        return (
+            self._index_missing_at is None
+            or time.monotonic() - self._index_missing_at >= self._index_retry_seconds
+        )
+
+    def scan_all(self, **scan_kwargs):
+        """Leitura completa da tabela, em paralelo quando scan_segments > 1"""
+        return parallel_scan(self.table, self.scan_segments, **scan_kwargs)
+
+    def get(self, book_id, fields=None):
+        response = self.table.get_item(Key={'id': book_id}, **projection_params(fields))
+        return response.get('Item')
+
+    def create(self, item):
+        """Grava um livro novo; levanta ClientError se o id já existir"""
+        self.table.put_item(
+            Item=item,
+            ConditionExpression='attribute_not_exists(id)'
+        )
+
+    def get_chunk(self, ids, **kwargs):
+        """
+        Lê até 100 ids com BatchGetItem.
+
+        Devolve os itens encontrados e os ids que o DynamoDB não conseguiu
+        processar mesmo após as novas tentativas.
+        """
+        items, unprocessed = batch_get_chunk(self.table, [{'id': book_id} for book_id in ids], **kwargs)
+        return items, [key['id'] for key in unprocessed]
+
+    def put_chunk(self, items):
+        """Grava até 25 livros com BatchWriteItem; devolve os que não foram gravados"""
+        return batch_write_chunk(self.table, items)
+
+    def plan(self, category=None, min_rating=None, title=None, use_index=True):
+        """Monta a operação mais barata para os filtros pedidos"""
+        filters = []
+        if title:
+            filters.append(Attr('title').contains(title))
+
+        if category and use_index and self._index_available():
+            key_condition = Key('category').eq(category)
+            if min_rating is not None:
+                key_condition = key_condition & Key('rating').gte(min_rating)
+            params = {'IndexName': self.category_index, 'KeyConditionExpression': key_condition}
+            if filters:
+                params['FilterExpression'] = filters[0]
+            return QueryPlan('query', params)
+
+        if category:
+            filters.append(Attr('category').eq(category))
+        if min_rating is not None:
+            filters.append(Attr('rating').gte(min_rating))
+        params = {}
+        if filters:
+            expression = filters[0]
+            for condition in filters[1:]:
+                expression = expression & condition
+            params['FilterExpression'] = expression
+        return QueryPlan('scan', params)
+
+    def find(self, category=None, min_rating=None, title=None, fields=None):
+        """Livros que atendem aos filtros, lidos via Query sempre que possível"""
+        plan = self.plan(category, min_rating, title)
+        plan.params.update(projection_params(fields))
+        logger.info(f"find category={category} min_rating={min_rating} title={title}: {plan}")
+        if plan.operation == 'scan':
+            return list(self.scan_all(**plan.params))
+        try:
+            return list(iter_query(self.table, **plan.params))
+        except ClientError as e:
+            error = e.response['Error']
+            if error['Code'] != 'ValidationException' or 'index' not in error.get('Message', '').lower():
+                raise
+            # tabela sem o GSI: segue com Scan e tenta o índice de novo depois de INDEX_RETRY_SECONDS
+            logger.warning(f"Índice {self.category_index} indisponível, usando Scan: {e}")
+            self._index_missing_at = time.monotonic()
+            plan = self.plan(category, min_rating, title, use_index=False)
+            plan.params.update(projection_params(fields))
+            return list(self.scan_all(**plan.params))
+
+    def list_categories(self):
+        """Categorias distintas, lendo apenas o atributo category"""
+        items = self.scan_all(
+            ProjectionExpression='#category',
+            ExpressionAttributeNames={'#category': 'category'}
+        )
+        return list(set(item['category'] for item in items if 'category' in item))
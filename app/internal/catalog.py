@@ -0,0 +1,236 @@
+import os
+import hashlib
+import threading
+import time
+import logging
+from bisect import bisect_left
+from decimal import Decimal
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TTL_SECONDS = float(os.getenv("CATALOG_TTL_SECONDS", "300"))
+
+
+def _canonical(value):
+    # int e Decimal com o mesmo valor (gravado pela API x lido do DynamoDB) geram o mesmo texto
+    if isinstance(value, (int, Decimal)) and not isinstance(value, bool):
+        return str(Decimal(value).normalize())
+    return repr(value)
+
+
+def book_digest(book):
+    """Hash determinístico de 64 bits de um livro (independe do PYTHONHASHSEED)"""
+    raw = repr(sorted((key, _canonical(value)) for key, value in book.items())).encode()
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big")
+
+
+class CatalogSnapshot:
+    """Foto do catálogo em memória, ordenada por id"""
+
+    def __init__(self, books, version, builders=None):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.books = sorted(books, key=lambda b: b['id'])
+        self.ids = [b['id'] for b in self.books]
+        self.by_id = {b['id']: b for b in self.books}
+        # XOR dos hashes dos livros: muda a cada escrita e é igual em workers com os mesmos dados
+        self.fingerprint = 0
+        for book in self.books:
+            self.fingerprint ^= book_digest(book)
+        self._categories = None
+        self._indexes = {}
+        self._index_lock = threading.RLock()
+        # índices já usados no cache; o reload os constrói antes de publicar a próxima foto
+        self._builders = {} if builders is None else builders
+
+    def __len__(self):
+        return len(self.books)
+
+    @property
+    def etag_version(self):
+        """Versão do conteúdo usada nos ETags"""
+        return f"{self.fingerprint:016x}"
+
+    def categories(self):
+        """Lista de categorias distintas, calculada uma vez por versão"""
+        if self._categories is None:
+            self._categories = list(set(b['category'] for b in self.books))
+        return self._categories
+
+    @property
+    def lock(self):
+        """Lock das escritas na foto; segure-o para ler um índice fora do event loop"""
+        return self._index_lock
+
+    def has_index(self, name):
+        return name in self._indexes
+
+    def index(self, name, builder):
+        """
+        Retorna um índice derivado desta foto, construído na primeira chamada.
+
+        `builder(books)` deve devolver um objeto com `upsert(book, previous)`,
+        chamado a cada livro gravado para manter o índice atualizado.
+        """
+        self._builders.setdefault(name, builder)
+        index = self._indexes.get(name)
+        if index is None:
+            with self._index_lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    started = time.monotonic()
+                    index = builder(self.books)
+                    self._indexes[name] = index
+                    logger.info(
+                        f"Índice '{name}' construído para {len(self)} livros "
+                        f"em {time.monotonic() - started:.3f}s"
+                    )
+        return index
+
+    def build_indexes(self):
+        """Constrói os índices registrados que ainda não existem nesta foto"""
+        for name, builder in list(self._builders.items()):
+            self.index(name, builder)
+
+    def upsert(self, book):
+        """Insere ou substitui um livro mantendo a ordem por id e os índices"""
+        with self._index_lock:
+            book_id = book['id']
+            previous = self.by_id.get(book_id)
+            pos = bisect_left(self.ids, book_id)
+            if previous is not None:
+                self.fingerprint ^= book_digest(previous)
+                self.books[pos] = book
+            else:
+                self.ids.insert(pos, book_id)
+                self.books.insert(pos, book)
+            self.by_id[book_id] = book
+            self.fingerprint ^= book_digest(book)
+            self._categories = None
+            for index in self._indexes.values():
+                index.upsert(book, previous)
+
+
+class CatalogCache:
+    """
+    Cache versionado do catálogo de livros.
+
+    Serve a última foto carregada; quando ela expira (TTL) dispara um reload
+    em background e continua servindo a foto antiga até o reload terminar.
+    Escritas bem-sucedidas são aplicadas direto na foto via `upsert`.
+    `on_load(snapshot)` é chamado a cada foto recém lida do loader.
+    """
+
+    def __init__(self, loader, ttl_seconds=CATALOG_TTL_SECONDS, on_load=None):
+        self._loader = loader
+        self._ttl = ttl_seconds
+        self._on_load = on_load
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+        self._reloading = False
+        self._loading = False
+        self._pending = []
+        self._builders = {}
+
+    def _is_stale(self, snapshot):
+        return time.monotonic() - snapshot.loaded_at >= self._ttl
+
+    def get(self):
+        """Retorna a foto atual, carregando de forma síncrona se ainda não existir"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._load_lock:
+                # outra requisição pode ter carregado enquanto esperávamos
+                snapshot = self._snapshot or self._load()
+            return snapshot
+        if self._is_stale(snapshot):
+            self.refresh_async()
+        return snapshot
+
+    def peek(self):
+        """Retorna a foto atual sem bloquear (None se ainda não carregada)"""
+        snapshot = self._snapshot
+        if snapshot is None or self._is_stale(snapshot):
+            self.refresh_async()
+        return snapshot
+
+    def reload(self):
+        """Recarrega o catálogo inteiro a partir do loader"""
+        with self._load_lock:
+            return self._load()
+
+    def _load(self):
+        with self._lock:
+            self._loading = True
+            self._pending = []
+        started = time.monotonic()
+        try:
+            books = list(self._loader())
+        except Exception:
+            with self._lock:
+                self._loading = False
+                self._pending = []
+            raise
+        # a foto e seus índices são montados fora do lock: leituras e escritas
+        # seguem usando a foto atual, e a primeira requisição depois do reload
+        # não paga a reconstrução dos índices
+        snapshot = CatalogSnapshot(books, 0, self._builders)
+        snapshot.build_indexes()
+        with self._lock:
+            # escritas feitas durante o scan e a montagem podem não estar no resultado
+            for book in self._pending:
+                snapshot.upsert(book)
+            self._pending = []
+            self._loading = False
+            self._version += 1
+            snapshot.version = self._version
+            self._snapshot = snapshot
+        logger.info(
+            f"Catálogo carregado: {len(snapshot)} livros, versão {snapshot.version} "
+            f"em {time.monotonic() - started:.2f}s"
+        )
+        if self._on_load is not None:
+            try:
+                self._on_load(snapshot)
+            except Exception as e:
+                logger.error(f"Erro no on_load do catálogo: {e}")
+        return snapshot
+
+    def refresh_async(self):
+        """Dispara um reload em background, se nenhum estiver em andamento"""
+        # leitura sem lock: evita disputar o lock a cada requisição enquanto o reload roda
+        if self._reloading:
+            return
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        requested = time.monotonic()
+
+        def _run():
+            try:
+                with self._load_lock:
+                    # um `get` síncrono pode ter carregado enquanto esperávamos o lock
+                    current = self._snapshot
+                    if current is None or current.loaded_at < requested:
+                        self._load()
+            except Exception as e:
+                logger.error(f"Erro ao recarregar catálogo: {e}")
+            finally:
+                with self._lock:
+                    self._reloading = False
+
+        threading.Thread(target=_run, name="catalog-reload", daemon=True).start()
+
+    def upsert(self, book):
+        """Aplica um livro recém gravado na foto atual e incrementa a versão"""
+        with self._lock:
+            if self._loading:
+                self._pending.append(book)
+            if self._snapshot is None:
+                return
+            self._version += 1
+            self._snapshot.upsert(book)
+            self._snapshot.version = self._version
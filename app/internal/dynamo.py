@@ -0,0 +1,187 @@
+import os
+import queue
+import random
+import threading
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+logger = logging.getLogger(__name__)
+
+SCAN_SEGMENTS = int(os.getenv("DYNAMODB_SCAN_SEGMENTS", "4"))
+
+THROTTLING_ERRORS = (
+    'ProvisionedThroughputExceededException',
+    'ThrottlingException',
+    'RequestLimitExceeded',
+)
+
+
+def _backoff_sleep(attempt, base_delay=0.05, max_delay=5.0):
+    time.sleep(min(max_delay, base_delay * 2 ** attempt) * random.uniform(0.5, 1.0))
+
+
+def call_with_backoff(operation, max_attempts=8, base_delay=0.05, max_delay=5.0, **kwargs):
+    """
+    Executa uma chamada ao DynamoDB repetindo em caso de throttling.
+
+    Usa backoff exponencial com jitter; outros erros são propagados na hora.
+    """
+    for attempt in range(max_attempts):
+        try:
+            return operation(**kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] not in THROTTLING_ERRORS or attempt == max_attempts - 1:
+                raise
+            logger.warning(f"Throttling no DynamoDB, tentativa {attempt + 1} de {max_attempts}")
+            _backoff_sleep(attempt, base_delay, max_delay)
+
+
+def iter_scan(table, **scan_kwargs):
+    """
+    Percorre a tabela inteira seguindo o LastEvaluatedKey.
+
+    Cada chamada ao scan do DynamoDB devolve no máximo 1 MB; este gerador
+    emite os itens página a página, sem acumular a tabela em memória.
+    """
+    pages = 0
+    while True:
+        response = call_with_backoff(table.scan, **scan_kwargs)
+        pages += 1
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        scan_kwargs['ExclusiveStartKey'] = last_key
+    logger.debug(f"Scan em {table.name} concluído em {pages} páginas")
+
+
+def iter_query(table, **query_kwargs):
+    """Mesmo que `iter_scan`, para operações Query"""
+    while True:
+        response = call_with_backoff(table.query, **query_kwargs)
+        yield from response.get('Items', [])
+        last_key = response.get('LastEvaluatedKey')
+        if not last_key:
+            break
+        query_kwargs['ExclusiveStartKey'] = last_key
+
+
+_SEGMENT_DONE = object()
+
+
+def parallel_scan(table, total_segments=SCAN_SEGMENTS, max_workers=None, max_pending_pages=16, **scan_kwargs):
+    """
+    Scan paralelo usando Segment/TotalSegments.
+
+    Cada segmento é lido por uma thread do pool (no máximo `max_workers`
+    simultâneas) e as páginas são entregues por uma fila limitada, então a
+    memória não cresce com o tamanho da tabela. A ordem dos itens não é
+    garantida. As threads usam o client de baixo nível, que é thread-safe.
+    """
+    if total_segments <= 1:
+        yield from iter_scan(table, **scan_kwargs)
+        return
+
+    client = table.meta.client
+    pages = queue.Queue(maxsize=max_pending_pages)
+    stop = threading.Event()
+
+    def _put(payload):
+        while not stop.is_set():
+            try:
+                pages.put(payload, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _scan_segment(segment):
+        kwargs = dict(scan_kwargs, TableName=table.name, Segment=segment, TotalSegments=total_segments)
+        try:
+            while not stop.is_set():
+                response = call_with_backoff(client.scan, **kwargs)
+                if not _put(response.get('Items', [])):
+                    return
+                last_key = response.get('LastEvaluatedKey')
+                if not last_key:
+                    break
+                kwargs['ExclusiveStartKey'] = last_key
+        except Exception as e:
+            _put(e)
+        finally:
+            _put(_SEGMENT_DONE)
+
+    started = time.monotonic()
+    executor = ThreadPoolExecutor(max_workers=max_workers or total_segments, thread_name_prefix="scan-segment")
+    try:
+        for segment in range(total_segments):
+            executor.submit(_scan_segment, segment)
+        remaining = total_segments
+        while remaining:
+            payload = pages.get()
+            if payload is _SEGMENT_DONE:
+                remaining -= 1
+            elif isinstance(payload, Exception):
+                raise payload
+            else:
+                yield from payload
+        logger.debug(
+            f"Scan paralelo em {table.name} ({total_segments} segmentos) "
+            f"concluído em {time.monotonic() - started:.2f}s"
+        )
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+
+
+BATCH_WRITE_SIZE = 25
+BATCH_GET_SIZE = 100
+
+
+def chunked(items, size):
+    """Divide uma sequência em listas de no máximo `size` elementos"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def batch_write_chunk(table, items, max_attempts=8):
+    """
+    Grava até 25 itens com BatchWriteItem.
+
+    Reenvia os UnprocessedItems com backoff exponencial e devolve os itens
+    que continuaram pendentes após `max_attempts` tentativas.
+    """
+    client = table.meta.client
+    requests = [{'PutRequest': {'Item': item}} for item in items]
+    for attempt in range(max_attempts):
+        response = call_with_backoff(client.batch_write_item, RequestItems={table.name: requests})
+        requests = response.get('UnprocessedItems', {}).get(table.name, [])
+        if not requests:
+            return []
+        logger.warning(f"{len(requests)} itens não processados no BatchWriteItem, tentativa {attempt + 1}")
+        _backoff_sleep(attempt)
+    return [request['PutRequest']['Item'] for request in requests]
+
+
+def batch_get_chunk(table, keys, max_attempts=8, **kwargs):
+    """
+    Lê até 100 chaves com BatchGetItem.
+
+    Reenvia as UnprocessedKeys com backoff exponencial. `kwargs` aceita
+    ProjectionExpression/ExpressionAttributeNames. Devolve os itens
+    encontrados (sem ordem garantida) e as chaves que não puderam ser lidas.
+    """
+    client = table.meta.client
+    found = []
+    request = dict(kwargs, Keys=keys)
+    for attempt in range(max_attempts):
+        response = call_with_backoff(client.batch_get_item, RequestItems={table.name: request})
+        found.extend(response.get('Responses', {}).get(table.name, []))
+        unprocessed = response.get('UnprocessedKeys', {}).get(table.name)
+        if not unprocessed or not unprocessed.get('Keys'):
+            return found, []
+        request = unprocessed
+        logger.warning(f"{len(request['Keys'])} chaves não processadas no BatchGetItem, tentativa {attempt + 1}")
+        _backoff_sleep(attempt)
+    return found, request['Keys']
@@ -0,0 +1,36 @@
+import os
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Threads dedicadas às chamadas bloqueantes do boto3; 0 executa inline (bloqueia o event loop)
+DYNAMODB_MAX_WORKERS = int(os.getenv("DYNAMODB_MAX_WORKERS", "32"))
+
+_executor = (
+    ThreadPoolExecutor(max_workers=DYNAMODB_MAX_WORKERS, thread_name_prefix="dynamodb")
+    if DYNAMODB_MAX_WORKERS > 0 else None
+)
+
+
+async def run_blocking(func, *args, **kwargs):
+    """
+    Executa uma chamada bloqueante (boto3) fora do event loop.
+
+    Handlers `async def` devem usar esta função para acessar o DynamoDB; assim
+    o worker continua atendendo outras requisições durante o round-trip.
+    """
+    if _executor is None:
+        return func(*args, **kwargs)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+
+async def map_blocking(func, chunks, return_exceptions=False):
+    """Executa `func(chunk)` para cada chunk em paralelo no executor, preservando a ordem"""
+    return await asyncio.gather(
+        *(run_blocking(func, chunk) for chunk in chunks),
+        return_exceptions=return_exceptions
+    )
@@ -0,0 +1,52 @@
+import csv
+import io
+import json
+import zlib
+from app.core.responses import json_default
+
+EXPORT_FIELDS = ['id', 'title', 'price', 'rating', 'availability', 'category', 'image']
+
+
+def iter_ndjson(items, rows_per_chunk=500):
+    """Um livro JSON por linha, agrupados em chunks de texto"""
+    lines = []
+    for item in items:
+        lines.append(json.dumps(item, default=json_default, ensure_ascii=False))
+        if len(lines) >= rows_per_chunk:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_csv(items, rows_per_chunk=500):
+    """CSV com cabeçalho fixo (EXPORT_FIELDS), agrupado em chunks de texto"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    rows = 0
+    for item in items:
+        writer.writerow(item)
+        rows += 1
+        if rows >= rows_per_chunk:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_encoded(chunks, gzip=False):
+    """Codifica os chunks em UTF-8 e, opcionalmente, comprime em gzip de forma incremental"""
+    if not gzip:
+        for chunk in chunks:
+            yield chunk.encode('utf-8')
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
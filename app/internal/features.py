@@ -0,0 +1,79 @@
+import numpy as np
+
+# Peso de cada bloco de features na distância euclidiana ponderada. Trocar de
+# grupo de categoria custa 2 * peso (duas posições do one-hot mudam), mais que
+# a maior diferença de preço, rating (na janela de MAX_RATING_DIFF) e
+# disponibilidade somados: livros do mesmo grupo vêm sempre antes.
+FEATURE_WEIGHTS = {"category": 1.0, "price": 1.0, "rating": 0.5, "availability": 0.5}
+
+
+class FeatureEncoder:
+    """
+    Codifica o catálogo nas features do modelo de recomendação.
+
+    A mesma instância é usada no treino e salva dentro do model.pkl, então o
+    serviço nunca recalcula features com outro mapa de categorias ou outra
+    escala de preço. A codificação é feita em bloco sobre as colunas de um
+    `BookColumns`: uma consulta por categoria/disponibilidade distinta, não
+    por livro.
+
+    Colunas: one-hot do grupo de categoria, preço normalizado (min-max do
+    catálogo de treino), rating em [0, 1] e disponibilidade (1 = em estoque),
+    cada bloco multiplicado pela raiz do seu peso, de modo que a distância
+    euclidiana simples entre linhas é a distância ponderada.
+    """
+
+    def __init__(self, category_groups, weights=None):
+        self.category_groups = dict(category_groups)
+        self.groups = sorted(set(self.category_groups.values()))
+        self.weights = dict(FEATURE_WEIGHTS, **(weights or {}))
+        self.price_min = 0.0
+        self.price_max = 1.0
+
+    @property
+    def feature_names(self):
+        return [f"category_group_{group}" for group in self.groups] + ["price", "rating", "availability"]
+
+    @property
+    def continuous_column(self):
+        """Índice da única feature contínua (preço); as demais têm poucos valores distintos"""
+        return len(self.groups)
+
+    def known(self, category):
+        return category in self.category_groups
+
+    def group(self, category):
+        return self.category_groups.get(category)
+
+    def fit(self, columns):
+        """Aprende a escala de preço do catálogo de treino"""
+        if len(columns):
+            self.price_min = float(columns.prices.min())
+            self.price_max = float(columns.prices.max())
+        return self
+
+    def encode(self, columns):
+        """Matriz de features (n x d) e máscara dos livros com categoria conhecida"""
+        position = {group: index for index, group in enumerate(self.groups)}
+        # o -1 extra cobre catálogos vazios (índice de `category_codes` vazio)
+        lookup = np.array(
+            [position.get(self.category_groups.get(name), -1) for name in columns.categories] + [-1],
+            dtype=np.intp
+        )
+        in_stock = np.array(
+            [str(name).lower().startswith("in stock") for name in columns.availabilities] + [False]
+        )
+        group_index = lookup[columns.category_codes]
+        valid = group_index >= 0
+
+        features = np.zeros((len(columns), len(self.groups) + 3), dtype=np.float64)
+        rows = np.flatnonzero(valid)
+        features[rows, group_index[rows]] = np.sqrt(self.weights["category"])
+
+        span = self.price_max - self.price_min
+        prices = (columns.prices - self.price_min) / span if span > 0 else np.zeros(len(columns))
+        features[:, -3] = prices * np.sqrt(self.weights["price"])
+        features[:, -2] = np.clip((columns.ratings - 1) / 4, 0, 1) * np.sqrt(self.weights["rating"])
+        features[:, -1] = in_stock[columns.availability_codes] * np.sqrt(self.weights["availability"])
+        features[~valid] = 0.0
+        return features, valid
@@ -0,0 +1,50 @@
+import base64
+import json
+from bisect import bisect_right
+from decimal import Decimal, InvalidOperation
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_token(*key):
+    """Codifica a chave do último item de uma página como next_token opaco"""
+    raw = json.dumps([str(value) for value in key]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_token(token):
+    """Decodifica um next_token; levanta ValueError se ele for inválido"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return tuple(Decimal(value) for value in values)
+    except (ValueError, TypeError, InvalidOperation) as e:
+        raise ValueError(f"next_token inválido: {token}") from e
+
+
+def page_after(books, ids, after_id, limit, predicate=None):
+    """
+    Devolve até `limit` livros com id maior que `after_id`.
+
+    `books` e `ids` são listas paralelas ordenadas por id. Retorna a página e
+    a chave `(id,)` do último livro emitido quando ainda há itens depois dele.
+    """
+    start = bisect_right(ids, after_id) if after_id is not None else 0
+    page = []
+    for i in range(start, len(books)):
+        book = books[i]
+        if predicate is not None and not predicate(book):
+            continue
+        if len(page) == limit:
+            return page, (page[-1]['id'],)
+        page.append(book)
+    return page, None
+
+
+def page_response(items, next_key):
+    """Formato padrão de resposta paginada"""
+    return {
+        "items": items,
+        "next_token": encode_token(*next_key) if next_key is not None else None,
+    }
@@ -0,0 +1,77 @@
+from bisect import bisect_left, bisect_right
+
+
+class PriceIndex:
+    """
+    Índice de livros ordenado por (preço, id).
+
+    Os preços são convertidos para float uma única vez na construção; uma
+    busca por faixa custa O(log n) para achar os limites mais O(k) para
+    percorrer os k livros devolvidos.
+    """
+
+    def __init__(self, books):
+        entries = sorted(((float(b['price']), b['id'], b) for b in books), key=lambda e: (e[0], e[1]))
+        self.prices = [e[0] for e in entries]
+        self.ids = [e[1] for e in entries]
+        self.books = [e[2] for e in entries]
+
+    def __len__(self):
+        return len(self.books)
+
+    def _position(self, price, book_id, right):
+        # posição de (price, book_id) dentro do bloco de preços iguais
+        lo = bisect_left(self.prices, price)
+        hi = bisect_right(self.prices, price, lo)
+        if right:
+            return bisect_right(self.ids, book_id, lo, hi)
+        return bisect_left(self.ids, book_id, lo, hi)
+
+    def upsert(self, book, previous=None):
+        """Mantém o índice atualizado quando um livro é gravado"""
+        if previous is not None:
+            pos = self._position(float(previous['price']), previous['id'], right=False)
+            if pos < len(self.ids) and self.ids[pos] == previous['id']:
+                del self.prices[pos]
+                del self.ids[pos]
+                del self.books[pos]
+        price = float(book['price'])
+        pos = self._position(price, book['id'], right=True)
+        self.prices.insert(pos, price)
+        self.ids.insert(pos, book['id'])
+        self.books.insert(pos, book)
+
+    def range(self, min_price, max_price, descending=False, after=None,
+              min_rating=None, max_rating=None, limit=None):
+        """
+        Livros com min_price <= preço <= max_price, ordenados por preço.
+
+        `after` é a chave (preço, id) do último livro da página anterior.
+        Retorna a página e a chave do último livro quando há mais resultados.
+        """
+        lo = bisect_left(self.prices, min_price)
+        hi = bisect_right(self.prices, max_price, lo)
+
+        if descending:
+            start = hi - 1
+            if after is not None:
+                start = min(start, self._position(after[0], after[1], right=False) - 1)
+            positions = range(start, lo - 1, -1)
+        else:
+            start = lo
+            if after is not None:
+                start = max(start, self._position(after[0], after[1], right=True))
+            positions = range(start, hi)
+
+        page = []
+        for i in positions:
+            book = self.books[i]
+            if min_rating is not None and book['rating'] < min_rating:
+                continue
+            if max_rating is not None and book['rating'] > max_rating:
+                continue
+            if limit is not None and len(page) == limit:
+                last = page[-1]
+                return page, (float(last['price']), last['id'])
+            page.append(book)
+        return page, None
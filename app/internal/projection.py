@@ -0,0 +1,41 @@
+BOOK_FIELDS = ('id', 'title', 'price', 'rating', 'availability', 'category', 'image')
+
+
+def parse_fields(fields):
+    """
+    Converte o parâmetro `fields` ("id,title,price") em uma tupla de atributos.
+
+    Devolve None quando nenhum campo foi pedido; levanta ValueError para
+    atributos desconhecidos.
+    """
+    if not fields:
+        return None
+    selected = tuple(dict.fromkeys(f.strip() for f in fields.split(',') if f.strip()))
+    unknown = [f for f in selected if f not in BOOK_FIELDS]
+    if unknown:
+        raise ValueError(f"Campos inválidos: {', '.join(unknown)}. Permitidos: {', '.join(BOOK_FIELDS)}")
+    return selected or None
+
+
+def projection_params(fields):
+    """ProjectionExpression equivalente, para Get/Query/Scan no DynamoDB"""
+    if not fields:
+        return {}
+    names = {f"#f{i}": field for i, field in enumerate(fields)}
+    return {
+        'ProjectionExpression': ', '.join(names),
+        'ExpressionAttributeNames': names,
+    }
+
+
+def project(item, fields):
+    """Mesma projeção aplicada a um item já em memória"""
+    if not fields:
+        return item
+    return {field: item[field] for field in fields if field in item}
+
+
+def project_all(items, fields):
+    if not fields:
+        return items
+    return [project(item, fields) for item in items]
@@ -0,0 +1,166 @@
+import numpy as np
+
+# recomendações guardadas por livro
+TOP_K = 5
+# diferença máxima de rating entre o livro e uma recomendação
+MAX_RATING_DIFF = 1
+# linhas processadas por vez no cálculo das distâncias (bloco x n floats em memória)
+BLOCK_SIZE = 1024
+
+
+def rating_aware_top_k(features, ratings, valid=None, k=TOP_K,
+                       max_rating_diff=MAX_RATING_DIFF, block_size=BLOCK_SIZE):
+    """
+    Para cada linha, as `k` linhas mais próximas com rating compatível.
+
+    As distâncias euclidianas são calculadas em blocos de linhas com
+    ||a||² + ||b||² - 2ab; candidatos com rating fora da janela, sem
+    features válidas (`valid` False) ou a própria linha ficam com distância
+    infinita. Devolve um array int32 (n x k) ordenado por distância e, em
+    empate, pela linha; posições sem candidato ficam com -1.
+    """
+    features = np.asarray(features, dtype=np.float64)
+    if features.ndim == 1:
+        features = features[:, None]
+    ratings = np.asarray(ratings, dtype=np.int16)
+    count = len(features)
+    valid = np.ones(count, dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+    result = np.full((count, k), -1, dtype=np.int32)
+    width = min(k, count - 1)
+    if width <= 0:
+        return result
+
+    squared = np.einsum("ij,ij->i", features, features)
+    for start in range(0, count, block_size):
+        stop = min(start + block_size, count)
+        rows = np.arange(start, stop)
+        distances = squared[start:stop, None] + squared[None, :] - 2 * features[start:stop] @ features.T
+        distances[np.abs(ratings[start:stop, None] - ratings[None, :]) > max_rating_diff] = np.inf
+        distances[:, ~valid] = np.inf
+        distances[rows - start, rows] = np.inf
+
+        nearest = np.argpartition(distances, width - 1, axis=1)[:, :width]
+        nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+        order = np.lexsort((nearest, nearest_distances), axis=1)
+        nearest = np.take_along_axis(nearest, order, axis=1)
+        nearest[np.take_along_axis(nearest_distances, order, axis=1) == np.inf] = -1
+        nearest[~valid[start:stop]] = -1
+        result[start:stop, :width] = nearest
+    return result
+
+
+def cell_top_k(features, ratings, valid=None, continuous_column=-1, k=TOP_K,
+               max_rating_diff=MAX_RATING_DIFF):
+    """
+    Mesmo resultado de `rating_aware_top_k`, sem comparar todos os pares.
+
+    Serve para features em que só a coluna `continuous_column` é contínua e
+    as demais têm poucos valores distintos (one-hot, rating, disponibilidade):
+    as linhas com a mesma parte discreta formam uma célula, e entre duas
+    células a distância é a distância fixa entre as células mais o quadrado
+    da diferença na coluna contínua. Com cada célula ordenada por essa coluna,
+    os k vizinhos de uma linha dentro de outra célula estão numa janela de
+    2(k + 1) posições em volta do `searchsorted`. As células candidatas são
+    visitadas da mais próxima para a mais distante, em bloco para todas as
+    linhas da célula consultada, e a busca para quando a distância fixa já
+    passa do k-ésimo melhor de todas elas. Empates são desfeitos pela linha.
+    """
+    features = np.asarray(features, dtype=np.float64)
+    ratings = np.asarray(ratings, dtype=np.int16)
+    count = len(features)
+    valid = np.ones(count, dtype=bool) if valid is None else np.asarray(valid, dtype=bool)
+    result = np.full((count, k), -1, dtype=np.int32)
+    rows = np.flatnonzero(valid)
+    if len(rows) < 2:
+        return result
+
+    values = features[rows, continuous_column]
+    keys = np.column_stack([np.delete(features[rows], continuous_column, axis=1), ratings[rows]])
+    cells, cell_of = np.unique(keys, axis=0, return_inverse=True)
+    cell_of = cell_of.ravel()
+    order = np.lexsort((rows, values, cell_of))
+    rows, values, cell_of = rows[order], values[order], cell_of[order]
+    ranges = np.searchsorted(cell_of, np.arange(len(cells) + 1))
+
+    discrete = cells[:, :-1]
+    squared = np.einsum("ij,ij->i", discrete, discrete)
+    cell_distances = np.maximum(squared[:, None] + squared[None, :] - 2 * discrete @ discrete.T, 0)
+    cell_distances[np.abs(cells[:, -1, None] - cells[None, :, -1]) > max_rating_diff] = np.inf
+    np.fill_diagonal(cell_distances, 0)
+    window = k + 1
+
+    for query in range(len(cells)):
+        query_rows = rows[ranges[query]:ranges[query + 1]]
+        query_values = values[ranges[query]:ranges[query + 1]]
+        best_distances = np.full((len(query_rows), k), np.inf)
+        best_rows = np.full((len(query_rows), k), -1, dtype=np.int64)
+        for cell in np.argsort(cell_distances[query], kind="stable").tolist():
+            base = cell_distances[query, cell]
+            if base == np.inf or base > best_distances[:, -1].max():
+                break
+            cell_rows = rows[ranges[cell]:ranges[cell + 1]]
+            cell_values = values[ranges[cell]:ranges[cell + 1]]
+            width = min(2 * window, len(cell_rows))
+            start = np.clip(np.searchsorted(cell_values, query_values) - window, 0, len(cell_rows) - width)
+            candidates = start[:, None] + np.arange(width)
+            candidate_rows = cell_rows[candidates]
+            distances = base + (cell_values[candidates] - query_values[:, None]) ** 2
+            distances[candidate_rows == query_rows[:, None]] = np.inf
+
+            merged_distances = np.hstack([best_distances, distances])
+            merged_rows = np.hstack([best_rows, candidate_rows])
+            keep = np.lexsort((merged_rows, merged_distances), axis=1)[:, :k]
+            best_distances = np.take_along_axis(merged_distances, keep, axis=1)
+            best_rows = np.take_along_axis(merged_rows, keep, axis=1)
+        best_rows[best_distances == np.inf] = -1
+        result[query_rows] = best_rows
+    return result
+
+
+class Recommender:
+    """
+    Modelo servido em /ml/predictions.
+
+    Guarda o encoder de features usado no treino, o id do livro de cada linha
+    treinada, as features e a tabela pré-calculada de recomendações por
+    linha. Entradas e saídas são ids de livro, então o serviço não depende da
+    ordem das linhas do catálogo.
+    """
+
+    def __init__(self, encoder, book_ids, features, valid, top_k):
+        self.encoder = encoder
+        self.book_ids = np.asarray(book_ids, dtype=np.int64)
+        self.features = features
+        self.valid = valid
+        self.top_k = top_k
+        self._id_order = None
+        self._sorted_ids = None
+
+    def __len__(self):
+        return len(self.top_k)
+
+    def rows_of(self, book_ids):
+        """Linhas do modelo para um array de ids; -1 para ids que não estavam no treino"""
+        if self._id_order is None:
+            self._id_order = np.argsort(self.book_ids, kind="stable")
+            self._sorted_ids = self.book_ids[self._id_order]
+        book_ids = np.asarray(book_ids, dtype=np.int64)
+        sorted_ids = self._sorted_ids
+        if not len(sorted_ids):
+            return np.full(book_ids.shape, -1, dtype=np.intp)
+        positions = np.minimum(np.searchsorted(sorted_ids, book_ids), len(sorted_ids) - 1)
+        return np.where(sorted_ids[positions] == book_ids, self._id_order[positions], -1)
+
+    def recommend(self, book_id):
+        """Ids recomendados para o livro `book_id`, do mais para o menos parecido"""
+        book_ids = self.recommend_many([book_id])[0]
+        return book_ids[book_ids >= 0]
+
+    def recommend_many(self, book_ids):
+        """Ids recomendados para vários livros de uma vez (len(book_ids) x k, -1 sem candidato)"""
+        rows = self.rows_of(book_ids)
+        result = np.full((len(rows), self.top_k.shape[1]), -1, dtype=np.int64)
+        trained = rows >= 0
+        neighbors = self.top_k[rows[trained]]
+        result[trained] = np.where(neighbors >= 0, self.book_ids[neighbors], -1)
+        return result
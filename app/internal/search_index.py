@@ -0,0 +1,314 @@
+import heapq
+import math
+import re
+import sys
+import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"\w+")
+
+# parâmetros padrão do BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def normalize(text):
+    """Remove acentos e aplica casefold para comparar textos"""
+    if text.isascii():
+        return text.casefold()
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(normalize(text))
+
+
+class TitleSearchIndex:
+    """
+    Índice invertido sobre os títulos normalizados do catálogo.
+
+    Cada token aponta para os ids dos livros que o contêm e a frequência no
+    título; as consultas pontuam só os livros das listas envolvidas (BM25) e
+    usam um heap para devolver os k melhores.
+    """
+
+    def __init__(self, books):
+        self.postings = defaultdict(dict)
+        self.doc_len = {}
+        self.total_len = 0
+        self.books = {}
+        self.categories = defaultdict(dict)
+        for book in books:
+            self._add(book)
+
+    def __len__(self):
+        return len(self.books)
+
+    def _add(self, book):
+        book_id = book['id']
+        tokens = tokenize(book['title'])
+        for token in tokens:
+            self.postings[token][book_id] = self.postings[token].get(book_id, 0) + 1
+        self.doc_len[book_id] = len(tokens)
+        self.total_len += len(tokens)
+        self.books[book_id] = book
+        self.categories[normalize(book['category'])][book_id] = book
+
+    def _remove(self, book):
+        book_id = book['id']
+        for token in set(tokenize(book['title'])):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(book_id, None)
+                if not postings:
+                    del self.postings[token]
+        self.total_len -= self.doc_len.pop(book_id, 0)
+        self.books.pop(book_id, None)
+        self.categories[normalize(book['category'])].pop(book_id, None)
+
+    def upsert(self, book, previous=None):
+        """Mantém o índice atualizado quando um livro é gravado"""
+        if previous is not None:
+            self._remove(previous)
+        self._add(book)
+
+    def in_category(self, category, min_rating=None, limit=None):
+        """Livros de uma categoria (sem diferenciar maiúsculas), ordenados por id"""
+        books = self.categories.get(normalize(category), {})
+        results = [books[i] for i in sorted(books)]
+        if min_rating is not None:
+            results = [b for b in results if b['rating'] >= min_rating]
+        if limit is not None:
+            results = results[:limit]
+        return results
+
+    def search(self, query, category=None, min_rating=None, limit=None):
+        """
+        Busca livros cujo título contém algum token da consulta.
+
+        Os resultados vêm ordenados pela pontuação BM25; com `limit` apenas os
+        k melhores são extraídos via heap. `category` e `min_rating` restringem
+        os candidatos.
+        """
+        tokens = set(tokenize(query))
+        if not tokens or not self.books:
+            return []
+
+        allowed = None
+        if category:
+            allowed = self.categories.get(normalize(category))
+            if not allowed:
+                return []
+
+        total_docs = len(self.books)
+        avg_len = self.total_len / total_docs
+        scores = defaultdict(float)
+        for token in tokens:
+            postings = self.postings.get(token)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+            for book_id, tf in postings.items():
+                if allowed is not None and book_id not in allowed:
+                    continue
+                if min_rating is not None and self.books[book_id]['rating'] < min_rating:
+                    continue
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[book_id] / avg_len)
+                scores[book_id] += idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+        # empate na pontuação: menor id primeiro
+        rank = lambda item: (item[1], -item[0])
+        if limit is not None:
+            best = heapq.nlargest(limit, scores.items(), key=rank)
+        else:
+            best = sorted(scores.items(), key=rank, reverse=True)
+        return [self.books[book_id] for book_id, _ in best]
+
+
+class TitlePrefixIndex:
+    """
+    Índice de prefixos para autocomplete: títulos normalizados em arrays
+    ordenados, consultados por bisect.
+
+    Há um array por rating; todos os títulos que começam com um prefixo ocupam
+    uma faixa contígua de cada array. A consulta percorre os ratings do maior
+    para o menor e para ao juntar `limit` sugestões, então custa
+    O(r log n + limit) independente de quantos títulos casam com o prefixo.
+    """
+
+    def __init__(self, books):
+        self.buckets = {}
+        entries = sorted(((normalize(b['title']), b['id'], b) for b in books), key=lambda e: (e[0], e[1]))
+        for key, _, book in entries:
+            keys, bucket_books = self.buckets.setdefault(book['rating'], ([], []))
+            keys.append(key)
+            bucket_books.append(book)
+        self._ratings = sorted(self.buckets, reverse=True)
+
+    def __len__(self):
+        return sum(len(keys) for keys, _ in self.buckets.values())
+
+    def upsert(self, book, previous=None):
+        """Mantém o índice atualizado quando um livro é gravado"""
+        if previous is not None and previous['rating'] in self.buckets:
+            keys, books = self.buckets[previous['rating']]
+            key = normalize(previous['title'])
+            lo = bisect_left(keys, key)
+            hi = bisect_right(keys, key, lo)
+            for i in range(lo, hi):
+                if books[i]['id'] == previous['id']:
+                    del keys[i]
+                    del books[i]
+                    break
+        if book['rating'] not in self.buckets:
+            self.buckets[book['rating']] = ([], [])
+            self._ratings = sorted(self.buckets, reverse=True)
+        keys, books = self.buckets[book['rating']]
+        key = normalize(book['title'])
+        pos = bisect_right(keys, key)
+        keys.insert(pos, key)
+        books.insert(pos, book)
+
+    def complete(self, prefix, limit=10):
+        """Até `limit` livros cujo título começa com `prefix`, por rating decrescente"""
+        prefix = normalize(prefix).lstrip()
+        if not prefix:
+            return []
+
+        results = []
+        for rating in self._ratings:
+            keys, books = self.buckets[rating]
+            lo = bisect_left(keys, prefix)
+            hi = min(bisect_left(keys, prefix + "\U0010ffff", lo), lo + limit - len(results))
+            results.extend(books[lo:hi])
+            if len(results) >= limit:
+                break
+        return results
+
+    def memory_footprint(self):
+        """Estimativa em bytes da memória ocupada pelo índice (sem os livros em si)"""
+        titles = len(self)
+        keys_bytes = sum(
+            sys.getsizeof(keys) + sum(sys.getsizeof(k) for k in keys)
+            for keys, _ in self.buckets.values()
+        )
+        refs_bytes = sum(sys.getsizeof(books) for _, books in self.buckets.values())
+        total = keys_bytes + refs_bytes
+        return {
+            "titles": titles,
+            "keys_bytes": keys_bytes,
+            "book_refs_bytes": refs_bytes,
+            "total_bytes": total,
+            "bytes_per_title": round(total / titles, 1) if titles else 0,
+        }
+
+
+def title_key(title):
+    """Chave de comparação exata de títulos: normalizada e com espaços colapsados"""
+    return " ".join(normalize(title).split())
+
+
+def trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# similaridade mínima (Dice sobre trigramas) para aceitar um título aproximado
+FUZZY_MIN_SIMILARITY = 0.6
+
+
+class TitleLookup:
+    """
+    Índice título -> linha do catálogo.
+
+    A busca exata é um acesso a dict pela chave normalizada. O fallback
+    aproximado só visita as linhas que compartilham algum trigrama com o
+    título pedido, contando os trigramas em comum (coeficiente de Dice).
+    Títulos repetidos apontam para a primeira linha em que aparecem.
+    """
+
+    def __init__(self, titles):
+        self.rows = {}
+        self.keys = []
+        self._trigrams = None
+        self._gram_counts = None
+        for row, title in enumerate(titles):
+            self._add(row, title)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _add(self, row, title):
+        key = title_key(title)
+        self.rows.setdefault(key, row)
+        if row == len(self.keys):
+            self.keys.append(key)
+        else:
+            self.keys[row] = key
+        if self._trigrams is not None:
+            grams = trigrams(key)
+            for gram in grams:
+                self._trigrams[gram].append(row)
+            self._gram_counts.append(len(grams))
+
+    def _trigram_postings(self):
+        # construído só na primeira busca aproximada
+        if self._trigrams is None:
+            postings = defaultdict(list)
+            counts = []
+            for row, key in enumerate(self.keys):
+                grams = trigrams(key)
+                for gram in grams:
+                    postings[gram].append(row)
+                counts.append(len(grams))
+            self._trigrams, self._gram_counts = postings, counts
+        return self._trigrams
+
+    def set(self, row, title):
+        """Registra o título de uma linha nova ou alterada"""
+        if row < len(self.keys):
+            old_key = self.keys[row]
+            if self.rows.get(old_key) == row:
+                del self.rows[old_key]
+            self._trigrams = self._gram_counts = None
+        self._add(row, title)
+
+    def find(self, title):
+        """Linha do título exato (ignorando caixa, acentos e espaços), ou None"""
+        return self.rows.get(title_key(title))
+
+    def find_fuzzy(self, title, min_similarity=FUZZY_MIN_SIMILARITY):
+        """Linha do título mais parecido, com a similaridade; (None, 0.0) se nenhum passar do mínimo"""
+        key = title_key(title)
+        grams = trigrams(key)
+        postings = self._trigram_postings()
+        # Dice >= t exige ao menos t*|q|/(2-t) trigramas em comum: as `needed - 1`
+        # listas mais longas podem ficar fora da contagem, pois todo candidato
+        # válido aparece em alguma das demais
+        needed = max(math.ceil(min_similarity * len(grams) / (2 - min_similarity)), 1)
+        by_length = sorted(grams, key=lambda gram: len(postings.get(gram, ())))
+        counted, skipped = by_length[:len(grams) - needed + 1], by_length[len(grams) - needed + 1:]
+        shared = defaultdict(int)
+        for gram in counted:
+            for row in postings.get(gram, ()):
+                shared[row] += 1
+
+        best_row, best_score = None, 0.0
+        # candidatos com mais trigramas em comum primeiro; para quando nem o
+        # limite superior (todas as listas ignoradas também em comum) supera o melhor
+        for row, count in sorted(shared.items(), key=lambda entry: (-entry[1], entry[0])):
+            total = len(grams) + self._gram_counts[row]
+            if 2 * (count + len(skipped)) / total < max(best_score, min_similarity):
+                if 2 * (count + len(skipped)) / (len(grams) + 1) < max(best_score, min_similarity):
+                    break
+                continue
+            row_grams = trigrams(self.keys[row])
+            score = 2 * (count + sum(1 for gram in skipped if gram in row_grams)) / total
+            if score > best_score:
+                best_row, best_score = row, score
+        if best_score < min_similarity:
+            return None, 0.0
+        return best_row, best_score
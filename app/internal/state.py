@@ -0,0 +1,48 @@
+import os
+import boto3
+from botocore.config import Config
+from app.internal.books_repository import BooksRepository
+from app.internal.catalog import CatalogCache
+from app.internal.executor import DYNAMODB_MAX_WORKERS, run_blocking
+from app.internal.stats import CatalogStats
+from app.internal.stats_store import STATS_TABLE, StatsStore
+
+# Recursos compartilhados pelos routers (books, insights): tabelas, foto do
+# catálogo e item de estatísticas, criados uma vez por processo.
+
+# DYNAMODB_ENDPOINT_URL permite apontar para um DynamoDB Local
+dynamodb = boto3.resource(
+    'dynamodb',
+    region_name='us-east-2',
+    endpoint_url=os.getenv("DYNAMODB_ENDPOINT_URL"),
+    # uma conexão HTTP por thread do executor, para o pool não virar gargalo
+    config=Config(max_pool_connections=max(10, DYNAMODB_MAX_WORKERS))
+)
+table = dynamodb.Table('Books')
+repository = BooksRepository(table)
+stats_store = StatsStore(dynamodb.Table(STATS_TABLE))
+
+
+
+def reconcile_stats(snapshot):
+    """Regrava o item de estatísticas a partir de uma foto recém lida, se ele estiver vencido"""
+    stats_store.reconcile(snapshot.index("stats", CatalogStats), snapshot.lock)
+
+
+# Foto do catálogo em memória; evita um scan completo por requisição
+catalog = CatalogCache(repository.scan_all, on_load=reconcile_stats)
+
+
+async def current_snapshot():
+    """Foto do catálogo; a carga inicial roda fora do event loop"""
+    snapshot = catalog.peek()
+    if snapshot is None:
+        snapshot = await run_blocking(catalog.get)
+    return snapshot
+
+
+async def snapshot_index(snapshot, name, builder):
+    """Índice derivado da foto; a primeira construção roda fora do event loop"""
+    if snapshot.has_index(name):
+        return snapshot.index(name, builder)
+    return await run_blocking(snapshot.index, name, builder)
@@ -0,0 +1,149 @@
+import math
+import re
+from bisect import bisect_left, insort
+from decimal import Decimal
+
+PRICE_RE = re.compile(r"[-+]?\d+(?:[.,]\d+)?")
+
+
+def parse_price(value):
+    """
+    Converte um preço para float.
+
+    Aceita o formato do books.json ("£51.77") e os números do DynamoDB
+    (Decimal/int/float).
+    """
+    if isinstance(value, (int, float, Decimal)):
+        return float(value)
+    match = PRICE_RE.search(value or "")
+    if not match:
+        raise ValueError(f"Preço inválido: {value!r}")
+    return float(match.group().replace(",", "."))
+
+
+def percentile(sorted_values, q):
+    """Percentil q (0-100) com interpolação linear, como o padrão do NumPy"""
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+class RunningStats:
+    """Contagem, soma, média e variância (Welford) atualizadas a cada valor"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+
+    def remove(self, value):
+        if self.count <= 1:
+            self.__init__()
+            return
+        self.count -= 1
+        self.total -= value
+        delta = value - self.mean
+        self.mean -= delta / self.count
+        self._m2 = max(self._m2 - delta * (value - self.mean), 0.0)
+
+    @property
+    def variance(self):
+        """Variância populacional"""
+        return self._m2 / self.count if self.count else 0.0
+
+
+class CatalogStats:
+    """
+    Agregados de preço do catálogo, mantidos de forma incremental.
+
+    É construído com uma passada sobre o catálogo e atualizado por
+    `upsert(book, previous)` a cada livro gravado: contagem, soma, média e
+    variância em O(1), e a lista ordenada de preços da categoria (para
+    mínimo, máximo e percentis) com uma inserção por bisect. Como é um
+    índice da foto do catálogo, cada reload do catálogo refaz o cálculo do
+    zero e corrige qualquer desvio acumulado.
+    """
+
+    def __init__(self, books):
+        self.overall = RunningStats()
+        self.by_category = {}
+        self.prices = {}
+        self._summaries = {}
+        for book in books:
+            self._add(book)
+        for prices in self.prices.values():
+            prices.sort()
+
+    def _add(self, book, keep_sorted=False):
+        category = book['category']
+        price = parse_price(book['price'])
+        self.overall.add(price)
+        running = self.by_category.get(category)
+        if running is None:
+            running = self.by_category[category] = RunningStats()
+            self.prices[category] = []
+        running.add(price)
+        if keep_sorted:
+            insort(self.prices[category], price)
+        else:
+            self.prices[category].append(price)
+        self._summaries.pop(category, None)
+
+    def _remove(self, book):
+        category = book['category']
+        price = parse_price(book['price'])
+        self.overall.remove(price)
+        self.by_category[category].remove(price)
+        prices = self.prices[category]
+        del prices[bisect_left(prices, price)]
+        if not prices:
+            del self.by_category[category]
+            del self.prices[category]
+        self._summaries.pop(category, None)
+
+    def upsert(self, book, previous=None):
+        if previous is not None:
+            self._remove(previous)
+        self._add(book, keep_sorted=True)
+
+    def overview(self):
+        return {
+            "total_books": self.overall.count,
+            "total_price": round(self.overall.total, 2),
+            "mean_price": round(self.overall.mean),
+            "price_stddev": round(math.sqrt(self.overall.variance), 2),
+        }
+
+    def summary(self, category):
+        """Estatísticas de uma categoria; só é recalculada depois de uma escrita nela"""
+        summary = self._summaries.get(category)
+        if summary is None:
+            running = self.by_category[category]
+            prices = self.prices[category]
+            summary = {
+                "count": running.count,
+                "total_price": round(running.total, 2),
+                "mean_price": round(running.mean, 2),
+                "price_stddev": round(math.sqrt(running.variance), 2),
+                "min_price": prices[0],
+                "max_price": prices[-1],
+                "median_price": round(percentile(prices, 50), 2),
+                "p25_price": round(percentile(prices, 25), 2),
+                "p75_price": round(percentile(prices, 75), 2),
+                "p90_price": round(percentile(prices, 90), 2),
+            }
+            self._summaries[category] = summary
+        return summary
+
+    def categories(self):
+        return {category: self.summary(category) for category in sorted(self.by_category)}
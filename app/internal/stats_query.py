@@ -0,0 +1,132 @@
+import re
+import threading
+from collections import OrderedDict
+import numpy as np
+from app.internal.book_columns import parse_rating
+
+GROUP_BY_FIELDS = ("category", "rating", "availability")
+METRICS = ("count", "sum", "mean", "median")
+PERCENTILE_RE = re.compile(r"^p(\d{1,2}|100)$")
+QUERY_CACHE_SIZE = 256
+
+
+def parse_metric(metric):
+    """Valida a métrica; devolve o percentil (0-100) para pXX e None para as demais"""
+    if metric in METRICS:
+        return 50.0 if metric == "median" else None
+    match = PERCENTILE_RE.match(metric or "")
+    if not match:
+        raise ValueError(f"Métrica inválida: {metric!r}. Use count, sum, mean, median ou pXX (ex.: p90)")
+    return float(match.group(1))
+
+
+def validate_query(metric, group_by):
+    """Valida métrica e agrupamento (ValueError se inválidos); devolve o percentil de `parse_metric`"""
+    if group_by is not None and group_by not in GROUP_BY_FIELDS:
+        raise ValueError(f"group_by inválido: {group_by!r}. Use {', '.join(GROUP_BY_FIELDS)}")
+    return parse_metric(metric)
+
+
+def _group_codes(columns, group_by):
+    """Códigos inteiros de agrupamento e o rótulo de cada código"""
+    if group_by == "category":
+        return columns.category_codes, columns.categories
+    if group_by == "availability":
+        return columns.availability_codes, columns.availabilities
+    return columns.ratings, list(range(int(columns.ratings.max(initial=0)) + 1))
+
+
+def run_query(columns, metric="count", group_by=None, category=None,
+              min_rating=None, max_rating=None, min_price=None, max_price=None):
+    """
+    Calcula uma métrica de preço sobre as colunas do catálogo.
+
+    Os filtros viram uma máscara booleana e o agrupamento usa os códigos
+    inteiros das colunas: count/sum/mean saem de um `bincount` e
+    mediana/percentis de uma única ordenação por (grupo, preço). As
+    colunas são lidas sob `columns.lock`, para um upsert concorrente não
+    deixar arrays com tamanhos diferentes.
+    """
+    q = validate_query(metric, group_by)
+    with columns.lock:
+        return _run_query(columns, metric, q, group_by, category, min_rating, max_rating, min_price, max_price)
+
+
+def _run_query(columns, metric, q, group_by, category, min_rating, max_rating, min_price, max_price):
+    mask = np.ones(len(columns), dtype=bool)
+    if category is not None:
+        code = columns.categories.index(category) if category in columns.categories else -1
+        mask &= columns.category_codes == code
+    if min_rating is not None:
+        mask &= columns.ratings >= parse_rating(min_rating)
+    if max_rating is not None:
+        mask &= columns.ratings <= parse_rating(max_rating)
+    if min_price is not None:
+        mask &= columns.prices >= min_price
+    if max_price is not None:
+        mask &= columns.prices <= max_price
+    prices = columns.prices[mask]
+
+    if group_by is None:
+        return {"metric": metric, "count": int(prices.size), "value": _metric_value(metric, q, prices)}
+
+    codes, labels = _group_codes(columns, group_by)
+    codes = codes[mask].astype(np.intp)
+    counts = np.bincount(codes, minlength=len(labels))
+    present = np.flatnonzero(counts)
+    if metric == "count":
+        values = counts[present]
+    elif metric in ("sum", "mean"):
+        sums = np.bincount(codes, weights=prices, minlength=len(labels))[present]
+        values = sums if metric == "sum" else sums / counts[present]
+    else:
+        order = np.lexsort((prices, codes))
+        groups = np.split(prices[order], np.cumsum(counts)[:-1])
+        values = [np.percentile(groups[code], q) for code in present]
+    results = [
+        {"group": labels[code], "count": int(counts[code]), "value": _round(value)}
+        for code, value in zip(present.tolist(), values)
+    ]
+    results.sort(key=lambda r: r["group"])
+    return {"metric": metric, "group_by": group_by, "results": results}
+
+
+def _metric_value(metric, q, prices):
+    if metric == "count":
+        return int(prices.size)
+    if not prices.size:
+        return None
+    if metric == "sum":
+        return _round(prices.sum())
+    if metric == "mean":
+        return _round(prices.mean())
+    return _round(np.percentile(prices, q))
+
+
+def _round(value):
+    if isinstance(value, (np.integer, int)):
+        return int(value)
+    return round(float(value), 2)
+
+
+class QueryCache:
+    """Cache LRU de resultados de consulta, chaveado pela versão do catálogo e pelos parâmetros"""
+
+    def __init__(self, max_size=QUERY_CACHE_SIZE):
+        self._max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Resultado em cache ou None"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        return None
+
+    def put(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
@@ -0,0 +1,286 @@
+import os
+import math
+import time
+import logging
+import threading
+from datetime import datetime, timezone
+from decimal import Decimal
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from app.internal.stats import parse_price
+
+logger = logging.getLogger(__name__)
+
+# Tabela com um único item de agregados do catálogo; ver create_tables.py e load_to_dynamodb.py
+STATS_TABLE = os.getenv("BOOK_STATS_TABLE", "BookStats")
+STATS_ITEM_ID = "catalog"
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "30"))
+STATS_RECONCILE_SECONDS = float(os.getenv("STATS_RECONCILE_SECONDS", "3600"))
+
+# Percentis gravados por categoria: atributo -> chave na resposta
+PERCENTILE_FIELDS = {"p50": "median_price", "p25": "p25_price", "p75": "p75_price", "p90": "p90_price"}
+
+
+def _number(value):
+    return Decimal(str(round(value, 6)))
+
+
+def category_attribute(metric, category):
+    """
+    Nome do atributo de uma métrica por categoria ("count|Poetry").
+
+    Os agregados ficam em atributos de primeiro nível para que as escritas da
+    API possam usar ADD, que o DynamoDB não aplica dentro de mapas.
+    """
+    return f"{metric}|{category}"
+
+
+def _sum_squares(running):
+    # soma dos quadrados recuperada do estado de Welford: M2 + n * média²
+    return running.variance * running.count + running.mean ** 2 * running.count
+
+
+def stats_to_item(stats, version):
+    """Item materializado a partir de um `CatalogStats` completo"""
+    overall = stats.overall
+    item = {
+        'id': STATS_ITEM_ID,
+        'version': version,
+        'reconciled_at': int(time.time()),
+        'updated_at': datetime.now(timezone.utc).isoformat(),
+        'book_count': overall.count,
+        'price_total': _number(overall.total),
+        'price_sum_squares': _number(_sum_squares(overall)),
+    }
+    for category, running in stats.by_category.items():
+        prices = stats.prices[category]
+        summary = stats.summary(category)
+        item[category_attribute('count', category)] = running.count
+        item[category_attribute('total', category)] = _number(running.total)
+        item[category_attribute('sumsq', category)] = _number(_sum_squares(running))
+        item[category_attribute('min', category)] = _number(prices[0])
+        item[category_attribute('max', category)] = _number(prices[-1])
+        for attribute, key in PERCENTILE_FIELDS.items():
+            item[category_attribute(attribute, category)] = _number(summary[key])
+    return item
+
+
+def _stddev(count, total, sum_squares):
+    if not count:
+        return 0.0
+    mean = total / count
+    return math.sqrt(max(sum_squares / count - mean ** 2, 0.0))
+
+
+class MaterializedStats:
+    """Agregados lidos do item de estatísticas, no mesmo formato de `CatalogStats`"""
+
+    def __init__(self, item):
+        self.item = item
+        self.version = f"m{item.get('version', 0)}"
+        self.reconciled_at = float(item.get('reconciled_at', 0))
+        self._overview = None
+        self._categories = None
+
+    def _float(self, name, default=0.0):
+        value = self.item.get(name)
+        return float(value) if value is not None else default
+
+    def overview(self):
+        if self._overview is None:
+            count = int(self.item.get('book_count', 0))
+            total = self._float('price_total')
+            self._overview = {
+                "total_books": count,
+                "total_price": round(total, 2),
+                "mean_price": round(total / count) if count else 0,
+                "price_stddev": round(_stddev(count, total, self._float('price_sum_squares')), 2),
+            }
+        return self._overview
+
+    def categories(self):
+        if self._categories is None:
+            names = sorted(
+                name.split("|", 1)[1] for name in self.item if name.startswith("count|")
+            )
+            categories = {}
+            for category in names:
+                count = int(self.item[category_attribute('count', category)])
+                if not count:
+                    continue
+                total = self._float(category_attribute('total', category))
+                summary = {
+                    "count": count,
+                    "total_price": round(total, 2),
+                    "mean_price": round(total / count, 2),
+                    "price_stddev": round(
+                        _stddev(count, total, self._float(category_attribute('sumsq', category))), 2
+                    ),
+                    "min_price": self._float(category_attribute('min', category), None),
+                    "max_price": self._float(category_attribute('max', category), None),
+                }
+                # percentis só mudam na reconciliação (a escrita incremental não os mantém)
+                for attribute, key in PERCENTILE_FIELDS.items():
+                    value = self._float(category_attribute(attribute, category), None)
+                    summary[key] = round(value, 2) if value is not None else None
+                categories[category] = summary
+            self._categories = categories
+        return self._categories
+
+
+class StatsStore:
+    """
+    Item de estatísticas materializado no DynamoDB, com cache em processo.
+
+    O item é gravado inteiro pela reconciliação (`reconcile`); as
+    escritas da API e do load_to_dynamodb.py somam nele com ADD (`record`). Assim
+    /stats custa no máximo um GetItem por `STATS_CACHE_SECONDS`, qualquer
+    que seja o tamanho do catálogo.
+    """
+
+    def __init__(self, table, cache_seconds=STATS_CACHE_SECONDS, reconcile_seconds=STATS_RECONCILE_SECONDS):
+        self.table = table
+        self._cache_seconds = cache_seconds
+        self._reconcile_seconds = reconcile_seconds
+        self._cached = None
+        self._fetched_at = 0.0
+        self._lock = threading.Lock()
+
+    def cached(self):
+        """Item em cache, se ainda válido (não faz chamada ao DynamoDB)"""
+        if self._cached is not None and time.monotonic() - self._fetched_at < self._cache_seconds:
+            return self._cached
+        return None
+
+    def get(self):
+        """Item atual; None se ainda não foi materializado"""
+        cached = self.cached()
+        if cached is not None:
+            return cached
+        item = self.table.get_item(Key={'id': STATS_ITEM_ID}).get('Item')
+        stats = MaterializedStats(item) if item else None
+        with self._lock:
+            self._cached = stats
+            self._fetched_at = time.monotonic() if stats else 0.0
+        return stats
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+            self._fetched_at = 0.0
+
+    def needs_reconcile(self, stats):
+        return time.time() - stats.reconciled_at >= self._reconcile_seconds
+
+    def record(self, books):
+        """
+        Soma livros recém criados ao item com um único UpdateItem.
+
+        Mínimo e máximo da categoria usam updates condicionais à parte, só
+        quando o preço novo ultrapassa o valor em cache. Sem o item (catálogo
+        nunca materializado) nada é gravado: a reconciliação cria o item.
+        """
+        if not books:
+            return
+        totals = {}
+        names = {'#count': 'book_count', '#total': 'price_total', '#sumsq': 'price_sum_squares',
+                 '#version': 'version', '#updated': 'updated_at'}
+        values = {':one': 1, ':updated': datetime.now(timezone.utc).isoformat()}
+        overall = [0, 0.0, 0.0]
+        bounds = {}
+        for book in books:
+            price = parse_price(book['price'])
+            category = book['category']
+            entry = totals.setdefault(category, [0, 0.0, 0.0])
+            for acc in (entry, overall):
+                acc[0] += 1
+                acc[1] += price
+                acc[2] += price * price
+            low, high = bounds.get(category, (price, price))
+            bounds[category] = (min(low, price), max(high, price))
+
+        values.update({':count': overall[0], ':total': _number(overall[1]), ':sumsq': _number(overall[2])})
+        adds = ['#count :count', '#total :total', '#sumsq :sumsq', '#version :one']
+        for n, (category, (count, total, sumsq)) in enumerate(totals.items()):
+            for metric, value in (('count', count), ('total', _number(total)), ('sumsq', _number(sumsq))):
+                names[f'#{metric}{n}'] = category_attribute(metric, category)
+                values[f':{metric}{n}'] = value
+                adds.append(f'#{metric}{n} :{metric}{n}')
+        try:
+            self.table.update_item(
+                Key={'id': STATS_ITEM_ID},
+                UpdateExpression='ADD ' + ', '.join(adds) + ' SET #updated = :updated',
+                ConditionExpression=Attr('id').exists(),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            logger.info("Item de estatísticas ainda não materializado; aguardando reconciliação")
+            return
+
+        current = self._cached.item if self._cached else {}
+        for category, (low, high) in bounds.items():
+            self._update_bound(current, 'min', category, low)
+            self._update_bound(current, 'max', category, high)
+        self.invalidate()
+
+    def _update_bound(self, current, metric, category, price):
+        attribute = category_attribute(metric, category)
+        known = current.get(attribute)
+        if known is not None and (price >= float(known) if metric == 'min' else price <= float(known)):
+            return
+        condition = Attr(attribute).not_exists() | (
+            Attr(attribute).gt(_number(price)) if metric == 'min' else Attr(attribute).lt(_number(price))
+        )
+        try:
+            self.table.update_item(
+                Key={'id': STATS_ITEM_ID},
+                UpdateExpression='SET #bound = :price',
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#bound': attribute},
+                ExpressionAttributeValues={':price': _number(price)}
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+
+    def _put_reconciled(self, item):
+        """
+        Regrava o item inteiro a partir de um `CatalogStats` completo.
+
+        A condição em `reconciled_at` faz com que só uma task por intervalo
+        regrave o item. Devolve True se o item foi gravado.
+        """
+        cutoff = int(time.time() - self._reconcile_seconds)
+        try:
+            self.table.put_item(
+                Item=item,
+                ConditionExpression=Attr('id').not_exists() | Attr('reconciled_at').lt(cutoff)
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+            # outra task reconciliou antes: relê o item para pegar o novo reconciled_at
+            self.invalidate()
+            return False
+        self.invalidate()
+        logger.info(f"Estatísticas reconciliadas: {item['book_count']} livros")
+        return True
+
+    def reconcile(self, stats, lock):
+        """
+        Regrava o item a partir de `stats`, se ele faltar ou estiver vencido.
+
+        Só deve receber agregados de uma foto recém lida do DynamoDB (ver
+        state.py): uma foto antiga não tem as escritas das outras tasks, e o
+        put apagaria os ADDs feitos por elas. O item é montado sob `lock`
+        porque a foto já pode estar recebendo upserts.
+        """
+        current = self.get()
+        if current is not None and not self.needs_reconcile(current):
+            return False
+        with lock:
+            item = stats_to_item(stats, time.time_ns() // 1000)
+        return self._put_reconciled(item)
@@ -1,7 +1,9 @@
 import json
 import pickle
-from sklearn.neighbors import NearestNeighbors
 import logging
+from app.internal.book_columns import BookColumns
+from app.internal.features import FeatureEncoder
+from app.internal.recommender import Recommender, TOP_K, cell_top_k
 
 logger = logging.getLogger(__name__)
 
@@ -86,31 +88,27 @@ def train_recommendation_model():
         print("Erro: Não foi possível criar mapa de categorias")
         return
     
-    # Preparar dados de treino
-    X = []
-    for book in BOOK_LIST:
-        book_category = book.get("category")
-        
+    # Preparar dados de treino: o encoder vai junto no model.pkl e é o mesmo usado no serviço
+    columns = BookColumns(BOOK_LIST)
+    encoder = FeatureEncoder(category_groups).fit(columns)
+    X, valid = encoder.encode(columns)
+    for book_category in columns.categories:
         # Verificar se a categoria existe no mapa
-        if book_category not in category_groups:
-            print(f"Aviso: Categoria '{book_category}' não encontrada no mapa. Pulando livro.")
-            continue
-        
-        group_number = category_groups[book_category]
-        X.append([group_number])
+        if not encoder.known(book_category):
+            print(f"Aviso: Categoria '{book_category}' não encontrada no mapa. Livros dela ficam sem recomendações.")
     
     # Verificar se há dados suficientes
-    if len(X) < 6:
-        print(f"Erro: Dados insuficientes para treinar. Apenas {len(X)} livros válidos.")
+    if valid.sum() < 6:
+        print(f"Erro: Dados insuficientes para treinar. Apenas {valid.sum()} livros válidos.")
         return
     
-    print(f"Total de livros válidos para treino: {len(X)}")
+    print(f"Total de livros válidos para treino: {valid.sum()}")
     
-    # Treinar modelo
+    # Treinar modelo: pré-calcular as recomendações de cada livro (distância euclidiana ponderada)
     try:
-        model = NearestNeighbors(n_neighbors=6)
-        model.fit(X)
-        print("Modelo treinado com sucesso!")
+        top_k = cell_top_k(X, columns.ratings, valid, encoder.continuous_column)
+        model = Recommender(encoder, columns.ids, X, valid, top_k)
+        print(f"Modelo treinado com sucesso! Top-{TOP_K} pré-calculado para {len(top_k)} livros")
     except Exception as e:
         print(f"Erro ao treinar modelo: {e}")
         return
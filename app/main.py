@@ -2,12 +2,19 @@ from fastapi import FastAPI
 from fastapi.responses import Response
 from .routers import books, insights, users, ml, auth
 from .internal.training_data import train_recommendation_model
+from .core.responses import CompressionMiddleware, FastJSONResponse
+from .internal.state import catalog
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="PosTech FIAP Book Recommendation API")
+app = FastAPI(
+    title="PosTech FIAP Book Recommendation API",
+    default_response_class=FastJSONResponse
+)
+# compressão brotli/gzip para todas as respostas JSON acima de RESPONSE_COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
 
 @app.on_event("startup")
 async def startup_event():
@@ -16,11 +23,15 @@ async def startup_event():
     
     try:
         train_recommendation_model()
+        ml.load_model()
         logger.info("Modelo treinado com sucesso no startup")
     except Exception as e:
         logger.error(f"Erro ao treinar modelo no startup: {e}")
         logger.warning("Aplicação continuará sem modelo treinado")
 
+    # Aquece o cache do catálogo sem bloquear o startup
+    catalog.refresh_async()
+
 app.include_router(books.router)
 app.include_router(insights.router)
 app.include_router(users.router)
@@ -58,6 +69,7 @@ def root():
                         "method": "GET",
                         "path": "/api/v1/books",
                         "description": "Get all book titles",
+                        "parameters": "?limit=number&next_token=string (optional pagination)",
                         "requires_auth": False
                     },
                     {
@@ -66,30 +78,58 @@ def root():
                         "description": "Get book by ID",
                         "requires_auth": False
                     },
+                    {
+                        "method": "POST",
+                        "path": "/api/v1/books/batch-get",
+                        "description": "Get up to 500 books by ID in one request, in request order",
+                        "parameters": "{\"ids\": [number]}",
+                        "requires_auth": False
+                    },
                     {
                         "method": "POST",
                         "path": "/api/v1/books",
                         "description": "Create a new book",
                         "requires_auth": True
                     },
+                    {
+                        "method": "POST",
+                        "path": "/api/v1/books/batch",
+                        "description": "Create up to 1000 books in one request (per-book results)",
+                        "requires_auth": True
+                    },
                     {
                         "method": "GET",
                         "path": "/api/v1/books/search",
                         "description": "Search books by title or category",
-                        "parameters": "?title=string&category=string",
+                        "parameters": "?title=string&category=string&limit=number",
+                        "requires_auth": False
+                    },
+                    {
+                        "method": "GET",
+                        "path": "/api/v1/books/export",
+                        "description": "Stream the full catalog as NDJSON or CSV",
+                        "parameters": "?format=ndjson|csv&gzip=boolean",
+                        "requires_auth": False
+                    },
+                    {
+                        "method": "GET",
+                        "path": "/api/v1/books/autocomplete",
+                        "description": "Autocomplete book titles by prefix, best rated first",
+                        "parameters": "?prefix=string&limit=number",
                         "requires_auth": False
                     },
                     {
                         "method": "GET",
                         "path": "/api/v1/books/top-rated",
                         "description": "Get books with rating >= 4",
+                        "parameters": "?limit=number&next_token=string (optional pagination)",
                         "requires_auth": False
                     },
                     {
                         "method": "GET",
                         "path": "/api/v1/books/price-range",
                         "description": "Get books within price range",
-                        "parameters": "?min=number&max=number",
+                        "parameters": "?min=number&max=number&sort=asc|desc&min_rating=number&max_rating=number&limit=number&next_token=string",
                         "requires_auth": False
                     }
                 ]
@@ -136,7 +176,14 @@ def root():
                         "method": "POST",
                         "path": "/api/v1/ml/predictions",
                         "description": "Get book recommendations based on a book title",
-                        "parameters": "book_title (string)",
+                        "parameters": "book_title (string), fuzzy (boolean, optional)",
+                        "requires_auth": False
+                    },
+                    {
+                        "method": "POST",
+                        "path": "/api/v1/ml/predictions/batch",
+                        "description": "Get book recommendations for a list of book titles",
+                        "parameters": "book_titles (list of strings), fuzzy (boolean, optional)",
                         "requires_auth": False
                     }
                 ]
@@ -155,6 +202,13 @@ def root():
                         "path": "/api/v1/stats/categories",
                         "description": "Get statistics by category",
                         "requires_auth": False
+                    },
+                    {
+                        "method": "GET",
+                        "path": "/api/v1/stats/query",
+                        "description": "Compute a price metric with optional grouping and filters",
+                        "parameters": "?metric=count|sum|mean|median|pXX&group_by=category|rating|availability&category=string&min_rating=number&max_rating=number&min_price=number&max_price=number",
+                        "requires_auth": False
                     }
                 ]
             },
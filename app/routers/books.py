@@ -1,16 +1,27 @@
-from fastapi import APIRouter, Request, Depends, HTTPException, status
+from fastapi import APIRouter, Request, Response, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-import boto3
+from typing import List, Literal
 import logging
 from decimal import Decimal
+from botocore.exceptions import BotoCoreError, ClientError
 from app.core.auth import get_current_user
+from app.core.http_cache import CATALOG_MAX_AGE, CATEGORIES_MAX_AGE, conditional_get
+from app.core.responses import fast_json
+from app.internal.executor import map_blocking, run_blocking
+from app.internal.state import catalog, current_snapshot, repository, snapshot_index, stats_store
+from app.internal.dynamo import BATCH_GET_SIZE, BATCH_WRITE_SIZE, chunked
+from app.internal.export import iter_csv, iter_encoded, iter_ndjson
+from app.internal.projection import parse_fields, project_all
+from app.internal.price_index import PriceIndex
+from app.internal.search_index import TitlePrefixIndex, TitleSearchIndex
+from app.internal.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_token, page_after, page_response
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-2')
-table = dynamodb.Table('Books')
-
 class Book(BaseModel):
     id: int
     title: str
@@ -19,9 +30,52 @@ class Book(BaseModel):
     availability: str
     category: str
 
-def get_all_books():
-    response = table.scan()
-    return response.get('Items', [])
+class BookIdsRequest(BaseModel):
+    ids: List[int]
+
+MAX_BATCH_BOOKS = 1000
+MAX_BATCH_GET_IDS = 500
+
+def book_to_item(book: Book):
+    return {
+        'id': book.id,
+        'title': book.title,
+        'price': Decimal(str(book.price)),
+        'rating': book.rating,
+        'availability': book.availability,
+        'category': book.category
+    }
+
+async def record_stats(items):
+    """Soma livros criados no item de estatísticas; uma falha aqui não desfaz a criação"""
+    try:
+        await run_blocking(stats_store.record, items)
+    except (BotoCoreError, ClientError) as e:
+        logger.error(f"Erro ao atualizar estatísticas materializadas: {str(e)}")
+
+def decode_next_token(next_token):
+    if next_token is None:
+        return None
+    try:
+        return decode_token(next_token)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="next_token inválido")
+
+def parse_fields_param(fields):
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def paginate_catalog(snapshot, limit, next_token, predicate=None):
+    after = decode_next_token(next_token)
+    return page_after(
+        snapshot.books,
+        snapshot.ids,
+        after[0] if after else None,
+        limit or DEFAULT_PAGE_SIZE,
+        predicate
+    )
 
 router = APIRouter(
     prefix="/api/v1",
@@ -46,18 +100,11 @@ async def create_book(
     request: Request,
     current_user = Depends(get_current_user)
 ):
+    item = book_to_item(book)
     try:
-        table.put_item(
-            Item={
-                'id': book.id,
-                'title': book.title,
-                'price': Decimal(str(book.price)),
-                'rating': book.rating,
-                'availability': book.availability,
-                'category': book.category
-            },
-            ConditionExpression='attribute_not_exists(id)'
-        )
+        await run_blocking(repository.create, item)
+        catalog.upsert(item)
+        await record_stats([item])
         logger.info(f"Book {book.id} created by user {current_user.username} from {request.client.host}")
         return {
             "message": "Livro criado com sucesso", 
@@ -71,69 +118,301 @@ async def create_book(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+### create books em lote. protegido por JWT ####
+@router.post("/books/batch",
+    responses={
+        200: {"description": "Resultado por livro: created, duplicate ou failed."},
+        400: {"description": "Lote vazio ou maior que o permitido"},
+        401: {"description": "Authentication required"},
+        500: {"description": "Internal server error"}
+    },
+    summary="Insere livros em lote",
+    description=(
+        f"Insere até {MAX_BATCH_BOOKS} livros usando BatchWriteItem. A detecção de ids duplicados é "
+        "best-effort: um livro criado com o mesmo id entre a verificação e a gravação é sobrescrito. "
+        "Requires JWT authentication."
+    )
+)
+async def create_books_batch(
+    books: List[Book],
+    request: Request,
+    current_user = Depends(get_current_user)
+):
+    if not books:
+        raise HTTPException(status_code=400, detail="Nenhum livro enviado")
+    if len(books) > MAX_BATCH_BOOKS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_BATCH_BOOKS} livros por requisição")
+
+    results = [None] * len(books)
+    candidates = {}
+    for pos, book in enumerate(books):
+        if book.id in candidates:
+            results[pos] = {"id": book.id, "status": "duplicate", "detail": "id repetido no lote"}
+        else:
+            candidates[book.id] = pos
+
+    # BatchWriteItem não aceita ConditionExpression: os ids já existentes são descartados antes.
+    # Verificação e gravação não são atômicas: um id criado entre as duas é sobrescrito (best-effort)
+    id_chunks = chunked(list(candidates), BATCH_GET_SIZE)
+    try:
+        lookups = await map_blocking(
+            lambda ids: repository.get_chunk(
+                ids, ProjectionExpression='#id', ExpressionAttributeNames={'#id': 'id'}
+            ),
+            id_chunks
+        )
+    except ClientError as e:
+        logger.error(f"Error checking batch ids: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    to_write = []
+    for found, unprocessed in lookups:
+        for existing in found:
+            pos = candidates.pop(existing['id'])
+            results[pos] = {"id": books[pos].id, "status": "duplicate", "detail": "Já existe um livro com esse ID"}
+        for book_id in unprocessed:
+            pos = candidates.pop(book_id)
+            results[pos] = {"id": books[pos].id, "status": "failed", "detail": "Não foi possível verificar o ID"}
+    for pos in candidates.values():
+        to_write.append(book_to_item(books[pos]))
+
+    created = []
+    write_chunks = chunked(to_write, BATCH_WRITE_SIZE)
+    outcomes = await map_blocking(repository.put_chunk, write_chunks, return_exceptions=True)
+    for chunk, outcome in zip(write_chunks, outcomes):
+        if isinstance(outcome, Exception):
+            logger.error(f"Error writing batch chunk: {str(outcome)}")
+            failed_ids = {item['id'] for item in chunk}
+        else:
+            failed_ids = {item['id'] for item in outcome}
+        for item in chunk:
+            pos = candidates[item['id']]
+            if item['id'] in failed_ids:
+                results[pos] = {"id": item['id'], "status": "failed", "detail": "Erro ao gravar no DynamoDB"}
+            else:
+                catalog.upsert(item)
+                created.append(item)
+                results[pos] = {"id": item['id'], "status": "created"}
+    await record_stats(created)
+
+    summary = {status: sum(1 for r in results if r["status"] == status) for status in ("created", "duplicate", "failed")}
+    logger.info(
+        f"Batch de {len(books)} livros por {current_user.username} from {request.client.host}: {summary}"
+    )
+    return {**summary, "results": results, "created_by": current_user.username}
+
+
+##### busca de varios books por id ########
+@router.post("/books/batch-get",
+    responses={
+        200: {"description": "Livros na ordem dos ids pedidos e ids não encontrados."},
+        400: {"description": "Lista de ids vazia ou maior que o permitido"},
+        500: {"description": "Internal server error"}
+    },
+    summary="Busca vários livros por id",
+    description=f"Busca até {MAX_BATCH_GET_IDS} livros usando BatchGetItem."
+)
+async def read_books_batch(body: BookIdsRequest, request: Request):
+    if not body.ids:
+        raise HTTPException(status_code=400, detail="Nenhum id enviado")
+    if len(body.ids) > MAX_BATCH_GET_IDS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_BATCH_GET_IDS} ids por requisição")
+
+    unique_ids = list(dict.fromkeys(body.ids))
+    try:
+        lookups = await map_blocking(repository.get_chunk, chunked(unique_ids, BATCH_GET_SIZE))
+    except ClientError as e:
+        logger.error(f"DynamoDB error: {e.response['Error']['Message']}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    found = {}
+    unprocessed = []
+    for items, unprocessed_ids in lookups:
+        for item in items:
+            found[item['id']] = item
+        unprocessed.extend(unprocessed_ids)
+    if unprocessed:
+        logger.error(f"Batch get sem resposta para {len(unprocessed)} ids")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+    logger.info(f"Busca de {len(body.ids)} ids realizada por {request.client.host}")
+    return fast_json({
+        "books": [found[book_id] for book_id in body.ids if book_id in found],
+        "missing": [book_id for book_id in unique_ids if book_id not in found],
+    })
+
+
 @router.get("/books/top-rated")
-async def get_books_top_rated():
-    books = get_all_books()
-    return [b for b in books if b['rating'] >= 4]
+async def get_books_top_rated(
+    request: Request,
+    response: Response,
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    next_token: str = None,
+    fields: str = Query(None, description="Atributos separados por vírgula, ex.: id,title,price"),
+):
+    selected = parse_fields_param(fields)
+    snapshot = await current_snapshot()
+    not_modified = conditional_get(request, response, snapshot.etag_version, CATALOG_MAX_AGE)
+    if not_modified:
+        return not_modified
+    if limit is None and next_token is None:
+        return fast_json(project_all([b for b in snapshot.books if b['rating'] >= 4], selected), response)
+
+    page, next_key = paginate_catalog(snapshot, limit, next_token, lambda b: b['rating'] >= 4)
+    return fast_json(page_response(project_all(page, selected), next_key), response)
 
 @router.get("/books/price-range")
-async def read_books_search(min: int = None, max: int = None):
+async def read_books_search(
+    request: Request,
+    response: Response,
+    min: float = None,
+    max: float = None,
+    sort: Literal["asc", "desc"] = "asc",
+    min_rating: int = Query(None, ge=0, le=5),
+    max_rating: int = Query(None, ge=0, le=5),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    next_token: str = None,
+    fields: str = Query(None, description="Atributos separados por vírgula, ex.: id,title,price"),
+):
     if min is None or max is None:
         return {"error": "Sua busca não encontrou nenhum livro com este valor. Corrija os parametros Min e Max e tente novamente"}
     
-    books = get_all_books()
-    price_range = [b for b in books if min <= float(b['price']) <= max]
+    selected = parse_fields_param(fields)
+    after = decode_next_token(next_token)
+    if after is not None:
+        after = (float(after[0]), after[1])
+    paginated = limit is not None or next_token is not None
+
+    snapshot = await current_snapshot()
+    not_modified = conditional_get(request, response, snapshot.etag_version, CATALOG_MAX_AGE)
+    if not_modified:
+        return not_modified
+    price_index = await snapshot_index(snapshot, "price", PriceIndex)
+    price_range, next_key = price_index.range(
+        min,
+        max,
+        descending=sort == "desc",
+        after=after,
+        min_rating=min_rating,
+        max_rating=max_rating,
+        limit=(limit or DEFAULT_PAGE_SIZE) if paginated else None
+    )
+    if paginated:
+        return fast_json(page_response(project_all(price_range, selected), next_key), response)
     
     if not price_range:
         return {"error": "Nenhum livro encontrado nessa faixa de preço."}
-    return price_range
+    return fast_json(project_all(price_range, selected), response)
 
 
 ##### buscar books por categoria e/ou title ########
 @router.get("/books/search")
 async def read_books_search(
     request: Request,
+    response: Response,
     title: str = None,
     category: str = None,
+    min_rating: int = Query(None, ge=0, le=5),
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    fields: str = Query(None, description="Atributos separados por vírgula, ex.: id,title,price"),
 ):
     if not title and not category:
         raise HTTPException(status_code=400, detail="Categoria ou titulo necessario para processar busca")
+    selected = parse_fields_param(fields)
     
     try:
-        filter_parts = []
-        expr_values = {}
-        
+        snapshot = catalog.peek()
+        if snapshot is None and not title:
+            # catálogo ainda carregando: só categoria vira Query no GSI, sem esperar o scan completo
+            results = await run_blocking(repository.find, category=category, min_rating=min_rating)
+            if results:
+                # mesma ordem (id) e projeção da busca pela foto
+                results.sort(key=lambda b: b['id'])
+                results = results[:limit] if limit else results
+                logger.info(f"Search category={category} via {repository.category_index}")
+                return fast_json(project_all(results, selected), response)
+            # nada com a grafia exata: a foto compara categorias sem diferenciar maiúsculas
+
+        # busca por título sempre pela foto (tokens + BM25), com cache frio ou quente
+        snapshot = snapshot or await current_snapshot()
+        not_modified = conditional_get(request, response, snapshot.etag_version, CATALOG_MAX_AGE)
+        if not_modified:
+            return not_modified
+        search_index = await snapshot_index(snapshot, "title_search", TitleSearchIndex)
         if title:
-            filter_parts.append("contains(#title, :title)")
-            expr_values[':title'] = title
-        
-        if category:
-            filter_parts.append("#category = :category")
-            expr_values[':category'] = category
-        
-        response = table.scan(
-            FilterExpression=' AND '.join(filter_parts),
-            ExpressionAttributeNames={
-                '#title': 'title',
-                '#category': 'category'
-            },
-            ExpressionAttributeValues=expr_values
-        )
+            results = search_index.search(title, category=category, min_rating=min_rating, limit=limit)
+        else:
+            results = search_index.in_category(category, min_rating=min_rating, limit=limit)
+        results = project_all(results, selected)
         
         logger.info(f"Search title={title} category={category}")
-        return response.get('Items', [])
+        return fast_json(results, response)
     
     except ClientError as e:
         logger.error(f"Search error: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+##### autocomplete de titulos ########
+@router.get("/books/autocomplete")
+async def read_books_autocomplete(
+    request: Request,
+    response: Response,
+    prefix: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=50),
+):
+    snapshot = await current_snapshot()
+    not_modified = conditional_get(request, response, snapshot.etag_version, CATALOG_MAX_AGE)
+    if not_modified:
+        return not_modified
+    prefix_index = await snapshot_index(snapshot, "title_prefix", TitlePrefixIndex)
+    return fast_json([
+        {"id": b['id'], "title": b['title'], "rating": b['rating']}
+        for b in prefix_index.complete(prefix, limit)
+    ], response)
+
+
+##### export do catalogo completo ########
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+@router.get("/books/export",
+    summary="Exporta o catálogo completo",
+    description="Transmite todos os livros em NDJSON ou CSV, lidos página a página do DynamoDB."
+)
+async def export_books(
+    request: Request,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    gzip: bool = False,
+):
+    items = repository.scan_all()
+    chunks = iter_csv(items) if format == "csv" else iter_ndjson(items)
+    filename = f"books.{format}" + (".gz" if gzip else "")
+    logger.info(f"Export {filename} iniciado por {request.client.host}")
+    # gerador síncrono: o Starlette o consome em threadpool, fora do event loop
+    return StreamingResponse(
+        iter_encoded(chunks, gzip=gzip),
+        media_type="application/gzip" if gzip else EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 ##### get books by id #########
 @router.get("/books/{id}")
-async def read_books_id(id: int, request: Request):
+async def read_books_id(
+    id: int,
+    request: Request,
+    response: Response,
+    fields: str = Query(None, description="Atributos separados por vírgula, ex.: id,title,price"),
+):
+    selected = parse_fields_param(fields)
+    # com o catálogo carregado, a versão dele também valida a leitura por id
+    snapshot = catalog.peek()
+    if snapshot is not None:
+        not_modified = conditional_get(request, response, snapshot.etag_version, CATALOG_MAX_AGE)
+        if not_modified:
+            return not_modified
     try:
-        response = table.get_item(Key={'id': id})
-        item = response.get('Item')
+        item = await run_blocking(repository.get, id, selected)
 
         if not item:
             raise HTTPException(status_code=404, detail="Book not found")
@@ -141,6 +420,9 @@ async def read_books_id(id: int, request: Request):
         logger.info(f"Busca por id={id} realizada por {request.client.host}")
         return item
 
+    except HTTPException:
+        raise
+
     except ClientError as e:
         logger.error(f"DynamoDB error: {e.response['Error']['Message']}")
         raise HTTPException(status_code=500, detail=e.response['Error']['Message'])
@@ -150,16 +432,39 @@ async def read_books_id(id: int, request: Request):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/books")
-async def read_books(request: Request):
-    books = get_all_books()
+async def read_books(
+    request: Request,
+    response: Response,
+    limit: int = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    next_token: str = None,
+    fields: str = Query(None, description="Atributos separados por vírgula, ex.: id,title,price"),
+):
+    selected = parse_fields_param(fields)
+    snapshot = await current_snapshot()
+    not_modified = conditional_get(request, response, snapshot.etag_version, CATALOG_MAX_AGE)
+    if not_modified:
+        return not_modified
     logger.info(f"Busca geral realizada por {request.client.host}")
-    return [b['title'] for b in books]
+    # sem `fields` a lista geral continua devolvendo apenas os títulos
+    to_response = (lambda books: project_all(books, selected)) if selected else (lambda books: [b['title'] for b in books])
+    if limit is None and next_token is None:
+        return fast_json(to_response(snapshot.books), response)
+
+    page, next_key = paginate_catalog(snapshot, limit, next_token)
+    return fast_json(page_response(to_response(page), next_key), response)
 
 @router.get("/categories")
-async def read_book_categories(request: Request):
-    books = get_all_books()
+async def read_book_categories(request: Request, response: Response):
+    snapshot = catalog.peek()
+    if snapshot is not None:
+        not_modified = conditional_get(request, response, snapshot.etag_version, CATEGORIES_MAX_AGE)
+        if not_modified:
+            return not_modified
+        categories = snapshot.categories()
+    else:
+        categories = await run_blocking(repository.list_categories)
     logger.info(f"Busca geral por categoria - realizada por {request.client.host}")
-    return list(set(b['category'] for b in books))
+    return categories
 
 
 ######## health check #######
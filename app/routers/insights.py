@@ -1,56 +1,98 @@
-from fastapi import APIRouter
-import json
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Optional
 import logging
+from botocore.exceptions import BotoCoreError, ClientError
+from app.core.http_cache import STATS_MAX_AGE, conditional_get
+from app.internal.book_columns import BookColumns, get_book_columns
+from app.internal.stats import CatalogStats
+from app.internal.stats_query import QueryCache, run_query, validate_query
+from app.internal.executor import run_blocking
+from app.internal.state import current_snapshot, snapshot_index, stats_store
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-with open("books.json", "r") as f:
-    BOOK_LIST = json.load(f)
-
 router = APIRouter(
     prefix="/api/v1",
     tags=["v1"],
 )
 
+# Estatísticas do books.json, usadas só quando o DynamoDB não está acessível
+BOOK_COLUMNS = get_book_columns()
+FALLBACK_STATS = CatalogStats(BOOK_COLUMNS.book(row) for row in range(len(BOOK_COLUMNS)))
+
+QUERY_CACHE = QueryCache()
+
+async def current_index(name, builder, fallback):
+    """Índice da foto do catálogo e a versão usada no ETag (books.json se o DynamoDB falhar)"""
+    try:
+        snapshot = await current_snapshot()
+    except (BotoCoreError, ClientError) as e:
+        logger.error(f"Erro ao carregar catálogo, usando books.json: {e}")
+        return fallback, BOOK_COLUMNS.version
+    return await snapshot_index(snapshot, name, builder), snapshot.etag_version
+
+async def current_stats():
+    """
+    Agregados do catálogo e a versão usada no ETag.
+
+    A fonte é o item materializado (StatsStore), lido no máximo uma vez por
+    STATS_CACHE_SECONDS, então o custo não depende do tamanho do catálogo.
+    Sem o item, os agregados são calculados a partir da foto do catálogo; a
+    gravação do item fica com o reload do catálogo (state.reconcile_stats).
+    """
+    materialized = stats_store.cached()
+    if materialized is None:
+        try:
+            materialized = await run_blocking(stats_store.get)
+        except (BotoCoreError, ClientError) as e:
+            logger.error(f"Erro ao ler estatísticas materializadas: {e}")
+
+    if materialized is not None:
+        return materialized, materialized.version
+    return await current_index("stats", CatalogStats, FALLBACK_STATS)
+
 @router.get("/stats/overview")
-async def get_stats():
-    total_price = 0
-    for book in BOOK_LIST:
-        book_price = float(book["price"][2:])
-        total_price = total_price + book_price
-    total_books = len(BOOK_LIST)
-    mean_price = round(total_price / total_books)
-    return {
-        "total_books": total_books,
-        "total_price": total_price,
-        "mean_price": mean_price,
-    }
+async def get_stats(request: Request, response: Response):
+    stats, version = await current_stats()
+    not_modified = conditional_get(request, response, version, STATS_MAX_AGE)
+    if not_modified:
+        return not_modified
+    return stats.overview()
 
 @router.get("/stats/categories")
-async def get_stats_categories():
-    categories = []
-    book_price = 0
-    avg_book_price = {}
-
-    for book in BOOK_LIST:
-        book_category = book["category"]
-        categories.append(book_category)
-
-    unique_categories = list(set(categories))
-    category_results = {}
-
-    for category in unique_categories:
-        books_in_category = []
-        total_book_price = {}
-        total_book_price[category] = 0
-        for book in BOOK_LIST:
-            if book["category"] == category:
-                book_price = float(book["price"][2:])
-                books_in_category.append(book)
-                total_book_price[category] = total_book_price[category] + book_price
-        avg_book_price[category] = round(
-            total_book_price[category] / len(books_in_category), 2
-        )
-        category_results[category] = len(books_in_category)  
-    return category_results, avg_book_price  
+async def get_stats_categories(request: Request, response: Response):
+    stats, version = await current_stats()
+    not_modified = conditional_get(request, response, version, STATS_MAX_AGE)
+    if not_modified:
+        return not_modified
+    return stats.categories()
+
+@router.get("/stats/query")
+async def query_stats(
+    request: Request,
+    response: Response,
+    metric: str = Query("count", description="count, sum, mean, median ou pXX (ex.: p90), sobre o preço"),
+    group_by: Optional[str] = Query(None, description="category, rating ou availability"),
+    category: Optional[str] = None,
+    min_rating: Optional[int] = Query(None, ge=0, le=5),
+    max_rating: Optional[int] = Query(None, ge=0, le=5),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+):
+    columns, version = await current_index("columns", BookColumns, BOOK_COLUMNS)
+    not_modified = conditional_get(request, response, version, STATS_MAX_AGE)
+    if not_modified:
+        return not_modified
+    try:
+        validate_query(metric, group_by)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    params = (metric, group_by, category, min_rating, max_rating, min_price, max_price)
+    key = (version, *params)
+    result = QUERY_CACHE.get(key)
+    if result is None:
+        # máscara e ordenação sobre o catálogo inteiro: fora do event loop
+        result = await run_blocking(run_query, columns, *params)
+        QUERY_CACHE.put(key, result)
+    return result
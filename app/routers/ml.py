@@ -1,37 +1,46 @@
-from fastapi import APIRouter, Request
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
-import json
+from typing import List
 import logging
+import numpy as np
 from app.internal.training_data import train_recommendation_model
+from app.internal.book_columns import get_book_columns
+from app.internal.recommender import MAX_RATING_DIFF, Recommender
+from app.internal.executor import run_blocking
+from app.core.http_cache import STATIC_MAX_AGE, conditional_get
+from app.core.responses import fast_json
 import pickle
 import os
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Carregar lista de livros com tratamento de erro
-try:
-    with open("books.json", "r") as f:
-        BOOK_LIST = json.load(f)
-    logger.info("books.json carregado com sucesso")
-except FileNotFoundError:
-    logger.error("Arquivo books.json não encontrado")
-    BOOK_LIST = []
-except json.JSONDecodeError:
-    logger.error("Erro ao decodificar books.json")
-    BOOK_LIST = []
-
-# Carregar modelo com tratamento de erro
-try:
-    with open("model.pkl", "rb") as m:
-        model = pickle.load(m)
+# Catálogo em colunas, compartilhado com o router de insights
+BOOK_COLUMNS = get_book_columns()
+# índice título -> linha montado já na carga
+BOOK_COLUMNS.title_lookup()
+
+model = None
+
+def load_model():
+    """Carrega (ou recarrega, após um treino) o model.pkl com tratamento de erro"""
+    global model
+    try:
+        with open("model.pkl", "rb") as m:
+            loaded = pickle.load(m)
+    except FileNotFoundError:
+        logger.error("Arquivo model.pkl não encontrado. Execute o treinamento primeiro.")
+        return
+    except Exception as e:
+        logger.error(f"Erro ao carregar model.pkl: {e}")
+        return
+    if not isinstance(loaded, Recommender) or getattr(loaded, "encoder", None) is None:
+        logger.error("model.pkl em formato antigo. Execute o treinamento novamente.")
+        return
+    model = loaded
     logger.info("model.pkl carregado com sucesso")
-except FileNotFoundError:
-    logger.error("Arquivo model.pkl não encontrado. Execute o treinamento primeiro.")
-    model = None
-except Exception as e:
-    logger.error(f"Erro ao carregar model.pkl: {e}")
-    model = None
+
+load_model()
 
 router = APIRouter(
     prefix="/api/v1",
@@ -40,66 +49,73 @@ router = APIRouter(
 
 class BookTitleRequest(BaseModel):
     book_title: str
+    # opcional: aceita o título mais parecido quando não há correspondência exata
+    fuzzy: bool = False
 
-# Mapa de categorias como constante global
-CATEGORY_MAP = {
-    "Poetry": 0,
-    "Historical Fiction": 1,
-    "Fiction": 2,
-    "Mystery": 3,
-    "History": 4,
-    "Young Adult": 5,
-    "Business": 6,
-    "Default": 7,
-    "Science Fiction": 8,
-    "Politics": 9,
-    "Travel": 10,
-    "Thriller": 11,
-    "Music": 12,
-    "Food and Drink": 13,
-    "Romance": 14,
-    "Childrens": 15,
-    "Nonfiction": 16,
-    "Art": 17,
-    "Spirituality": 18,
-    "Philosophy": 19,
-    "Sequential Art": 20
-}
+class BookTitlesRequest(BaseModel):
+    book_titles: List[str]
+    fuzzy: bool = False
+
+MAX_BATCH_TITLES = 50000
 
 @router.get("/ml/features")
-async def get_ml_features():
-    if not BOOK_LIST:
-        logger.error("BOOK_LIST está vazio")
+async def get_ml_features(request: Request, response: Response):
+    if model is None:
+        logger.error("Modelo não está carregado")
+        return {"error": "Modelo não disponível. Execute o treinamento primeiro."}
+    
+    if not len(BOOK_COLUMNS):
+        logger.error("Catálogo está vazio")
         return {"error": "Nenhum livro disponível"}
     
-    feature_data = []
-    for book in BOOK_LIST:
-        book_category = book.get("category")
-        
-        # Verifica se a categoria existe no mapa
-        if book_category not in CATEGORY_MAP:
-            logger.warning(f"Categoria '{book_category}' não encontrada no mapa")
-            continue
-        
-        feature_data.append({
-            "title": book["title"],
-            "category": book_category,
-            "category_feature": CATEGORY_MAP[book_category],
-        })
+    not_modified = conditional_get(request, response, BOOK_COLUMNS.version, STATIC_MAX_AGE)
+    if not_modified:
+        return not_modified
+    
+    # Features gravadas no treino pelo encoder do modelo, alinhadas ao catálogo pelo id
+    trained = np.flatnonzero(model.valid)
+    rows = BOOK_COLUMNS.rows_of(model.book_ids[trained])
+    feature_data = [
+        {
+            "title": BOOK_COLUMNS.titles[row],
+            "category": BOOK_COLUMNS.category(row),
+            "category_feature": model.encoder.group(BOOK_COLUMNS.category(row)),
+            "features": [round(value, 4) for value in features],
+        }
+        for row, features in zip(rows.tolist(), model.features[trained].tolist())
+        if row >= 0
+    ]
     
     logger.info(f"Retornando {len(feature_data)} features")
-    return {"Features": feature_data}
-
-def get_rating_value(rating_text):
-    """Converte rating de texto para número para comparação"""
-    rating_map = {
-        "One": 1,
-        "Two": 2, 
-        "Three": 3,
-        "Four": 4,
-        "Five": 5
+    return {"Features": feature_data, "feature_names": model.encoder.feature_names}
+
+def resolve_title(lookup, title, fuzzy):
+    """Linha do livro (None se não encontrado) e o tipo de correspondência"""
+    row = lookup.find(title)
+    if row is not None or not fuzzy:
+        return row, "exact"
+    row, similarity = lookup.find_fuzzy(title)
+    if row is not None:
+        logger.info(
+            f"Título '{title}' aproximado para '{BOOK_COLUMNS.titles[row]}' "
+            f"(similaridade {similarity:.2f})"
+        )
+    return row, "fuzzy"
+
+def recommendation_item(row):
+    return {
+        "title": BOOK_COLUMNS.titles[row],
+        "category": BOOK_COLUMNS.category(row),
+        "rating": BOOK_COLUMNS.rating_name(row),
+        "price": BOOK_COLUMNS.price_label(row)
+    }
+
+def input_book(row):
+    return {
+        "title": BOOK_COLUMNS.titles[row],
+        "rating": BOOK_COLUMNS.rating_name(row),
+        "price": BOOK_COLUMNS.price_label(row)
     }
-    return rating_map.get(rating_text, 0)
 
 @router.post("/ml/predictions")
 async def recommend_books(request: BookTitleRequest):
@@ -109,69 +125,106 @@ async def recommend_books(request: BookTitleRequest):
         logger.error("Modelo não está carregado")
         return {"error": "Modelo não disponível. Execute o treinamento primeiro."}
     
-    if not BOOK_LIST:
-        logger.error("BOOK_LIST está vazio")
+    if not len(BOOK_COLUMNS):
+        logger.error("Catálogo está vazio")
         return {"error": "Nenhum livro disponível"}
     
-    # Buscar o livro
-    book_found = None
-    for book in BOOK_LIST:
-        if book["title"].lower() == request.book_title.lower():
-            book_found = book
-            break
+    # Buscar o livro: título exato (sem caixa/acentos) e, se permitido, o mais parecido
+    lookup = BOOK_COLUMNS.title_lookup()
+    book_row, match = lookup.find(request.book_title), "exact"
+    if book_row is None and request.fuzzy:
+        # a busca aproximada percorre os trigramas do catálogo: fora do event loop
+        book_row, match = await run_blocking(resolve_title, lookup, request.book_title, True)
     
-    if not book_found:
+    if book_row is None:
         logger.warning(f"Livro '{request.book_title}' não encontrado")
         return {"error": "Livro não encontrado"}
     
-    # Verificar se a categoria existe no mapa
-    book_category = book_found.get("category")
-    if book_category not in CATEGORY_MAP:
+    # Verificar se a categoria é conhecida pelo encoder do modelo
+    book_category = BOOK_COLUMNS.category(book_row)
+    if not model.encoder.known(book_category):
         logger.error(f"Categoria '{book_category}' não encontrada no mapa")
         return {"error": "Categoria do livro não reconhecida"}
     
-    book_category_number = CATEGORY_MAP[book_category]
-    book_rating = book_found.get("rating")
-    book_rating_value = get_rating_value(book_rating)
+    book_rating = BOOK_COLUMNS.rating_name(book_row)
     
-    # Pedir ao modelo livros similares
-    try:
-        distances, indices = model.kneighbors([[book_category_number]])
-    except Exception as e:
-        logger.error(f"Erro ao buscar recomendações: {e}")
-        return {"error": "Erro ao gerar recomendações"}
-    
-    # Filtrar recomendações por rating similar ou igual
-    recommendations = []
-    for i in indices[0]:
-        candidate_book = BOOK_LIST[i]
-        
-        # Pula o próprio livro
-        if candidate_book["title"] == book_found["title"]:
-            continue
-            
-        candidate_rating_value = get_rating_value(candidate_book.get("rating"))
-        
-        # Só recomenda se o rating for similar ou igual (diferença máxima de 1)
-        if abs(candidate_rating_value - book_rating_value) <= 1:
-            recommendations.append({
-                "title": candidate_book["title"],
-                "category": candidate_book["category"],
-                "rating": candidate_book["rating"],
-                "price": candidate_book["price"]
-            })
-        
-        # Limita a 5 recomendações
-        if len(recommendations) >= 5:
-            break
+    # Recomendações pré-calculadas no treino (por id), já filtradas por rating similar ou igual
+    recommended = BOOK_COLUMNS.rows_of(model.recommend(int(BOOK_COLUMNS.ids[book_row])))
+    recommendations = [recommendation_item(i) for i in recommended.tolist() if i >= 0]
     
     logger.info(f"Retornando {len(recommendations)} recomendações para '{request.book_title}' com rating similar")
     return {
-        "input_book": {
-            "title": book_found["title"],
-            "rating": book_found["rating"],
-            "price": book_found["price"]
-        },
+        "input_book": input_book(book_row),
         "recommendations": recommendations,
-        "filter_criteria": f"Rating similar ou igual a '{book_rating}'"
+        "filter_criteria": f"Rating similar ou igual a '{book_rating}'",
+        "match": match
     }
+
+def batch_recommendations(titles, fuzzy):
+    """
+    Recomendações para uma lista de títulos.
+
+    Títulos repetidos são resolvidos uma vez; as linhas encontradas vão numa
+    única consulta à tabela de top-k do modelo e o filtro de rating é uma
+    máscara sobre o array resultante. Cada livro recomendado é montado uma vez,
+    por mais que apareça em vários resultados.
+    """
+    lookup = BOOK_COLUMNS.title_lookup()
+    resolved = {}
+    for title in titles:
+        if title not in resolved:
+            resolved[title] = resolve_title(lookup, title, fuzzy)
+    
+    rows = np.array([-1 if row is None else row for row, _ in resolved.values()], dtype=np.intp)
+    known_categories = np.array([model.encoder.known(name) for name in BOOK_COLUMNS.categories] + [False])
+    codes = np.where(rows >= 0, BOOK_COLUMNS.category_codes[rows], -1)
+    recognized = known_categories[codes]
+    
+    # o modelo responde em ids; voltam para linhas do catálogo (-1 se o livro saiu do catálogo)
+    recommended_ids = model.recommend_many(BOOK_COLUMNS.ids[rows[recognized]])
+    table = BOOK_COLUMNS.rows_of(recommended_ids.ravel()).reshape(recommended_ids.shape)
+    ratings = BOOK_COLUMNS.ratings.astype(np.int16)
+    keep = (table >= 0) & (
+        np.abs(ratings[table] - ratings[rows[recognized]][:, None]) <= MAX_RATING_DIFF
+    )
+    items = {row: recommendation_item(row) for row in np.unique(table[keep]).tolist()}
+    
+    by_title = {}
+    table_rows = iter(zip(table.tolist(), keep.tolist()))
+    for (title, (row, match)), ok in zip(resolved.items(), recognized.tolist()):
+        if row is None:
+            by_title[title] = {"book_title": title, "error": "Livro não encontrado"}
+            continue
+        if not ok:
+            by_title[title] = {"book_title": title, "error": "Categoria do livro não reconhecida"}
+            continue
+        neighbors, mask = next(table_rows)
+        by_title[title] = {
+            "book_title": title,
+            "input_book": input_book(row),
+            "recommendations": [items[i] for i, m in zip(neighbors, mask) if m],
+            "filter_criteria": f"Rating similar ou igual a '{BOOK_COLUMNS.rating_name(row)}'",
+            "match": match
+        }
+    return [by_title[title] for title in titles]
+
+@router.post("/ml/predictions/batch")
+async def recommend_books_batch(body: BookTitlesRequest, request: Request):
+    if model is None:
+        logger.error("Modelo não está carregado")
+        return {"error": "Modelo não disponível. Execute o treinamento primeiro."}
+    
+    if not len(BOOK_COLUMNS):
+        logger.error("Catálogo está vazio")
+        return {"error": "Nenhum livro disponível"}
+    
+    if not body.book_titles:
+        raise HTTPException(status_code=400, detail="Nenhum título enviado")
+    if len(body.book_titles) > MAX_BATCH_TITLES:
+        raise HTTPException(status_code=400, detail=f"Máximo de {MAX_BATCH_TITLES} títulos por requisição")
+    
+    # busca fuzzy e montagem do lote são CPU: fora do event loop
+    results = await run_blocking(batch_recommendations, body.book_titles, body.fuzzy)
+    found = sum(1 for result in results if "error" not in result)
+    logger.info(f"Retornando recomendações para {found} de {len(results)} títulos do lote")
+    return fast_json({"results": results, "found": found, "not_found": len(results) - found})
@@ -0,0 +1,307 @@
+"""
+Benchmark de carga da API inteira contra um DynamoDB em memória.
+
+Para cada tamanho de catálogo sobe a aplicação (app.main) em um processo
+separado, com as tabelas Books, BookStats, users e admin trocadas por tabelas em memória
+(benchmarks/memory_dynamodb.py) populadas com um catálogo sintético
+determinístico. Cada endpoint recebe `--requests` requisições com
+`--concurrency` em paralelo via httpx + ASGI, repetidas `--rounds` vezes,
+e o relatório mostra a melhor vazão e latência p50/p99 por endpoint.
+
+Com `--baseline` o resultado é comparado a uma execução anterior e o
+script sai com código 1 se algum endpoint ficar mais de `--threshold`
+pior em vazão ou p50, ou mais de `--p99-threshold` pior no p99. `--save-baseline` grava o resultado atual
+nesse arquivo. Os números dependem da máquina: a baseline versionada
+(benchmarks/baseline.json) vale só para a máquina em que foi gravada e serve
+de referência; para usar a comparação como gate, grave antes uma baseline
+no mesmo ambiente (--save-baseline) e compare contra ela.
+
+Requer as dependências de desenvolvimento (requirements-dev.txt, com httpx).
+
+Uso:
+    python benchmarks/api_load.py --sizes 1000,10000,100000
+    python benchmarks/api_load.py --baseline benchmarks/baseline.json --save-baseline
+    python benchmarks/api_load.py --baseline benchmarks/baseline.json --threshold 0.3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from decimal import Decimal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BENCH_USER = {'id': 1, 'username': 'bench', 'password': 'bench', 'email': 'bench@example.com'}
+CATEGORIES = [
+    "Poetry", "Historical Fiction", "Fiction", "Mystery", "History", "Young Adult", "Business",
+    "Default", "Science Fiction", "Politics", "Travel", "Thriller", "Music", "Food and Drink",
+    "Romance", "Childrens", "Nonfiction", "Art", "Spirituality", "Philosophy", "Sequential Art",
+]
+WORDS = [
+    "light", "attic", "velvet", "night", "river", "secret", "garden", "shadow", "house", "winter",
+    "stone", "city", "music", "history", "dream", "ocean", "letters", "fire", "silent", "golden",
+    "journey", "king", "queen", "world", "last", "little", "black", "wild", "summer", "star",
+]
+
+
+def synthetic_books(size, seed=42):
+    """Catálogo determinístico de `size` livros no formato gravado no DynamoDB"""
+    rng = random.Random(seed)
+    books = []
+    for book_id in range(1, size + 1):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 5))).title()
+        books.append({
+            'id': book_id,
+            'title': f"{title} {book_id}",
+            'price': Decimal(f"{rng.uniform(10, 60):.2f}"),
+            'rating': rng.randint(1, 5),
+            'availability': "In stock" if rng.random() < 0.9 else "Out of stock",
+            'category': rng.choice(CATEGORIES),
+        })
+    return books
+
+
+def scenarios(size, ml_titles):
+    """
+    Endpoints medidos: nome -> (fração das requisições, função i -> (método, path, json)).
+
+    Rotas que escrevem usam ids acima do catálogo para não colidir; o export
+    percorre o catálogo inteiro e por isso recebe menos requisições.
+    """
+    def book_id(i):
+        return (i * 7919) % size + 1
+
+    def new_book(book_id):
+        return {'id': book_id, 'title': f"Bench Book {book_id}", 'price': 19.9, 'rating': 4,
+                'availability': "In stock", 'category': "Fiction"}
+
+    return {
+        "GET /books": (1, lambda i: ("GET", "/api/v1/books?limit=100", None)),
+        "GET /books/{id}": (1, lambda i: ("GET", f"/api/v1/books/{book_id(i)}", None)),
+        "POST /books/batch-get": (1, lambda i: (
+            "POST", "/api/v1/books/batch-get", {'ids': [book_id(i + n) for n in range(50)]})),
+        "GET /books/top-rated": (1, lambda i: ("GET", "/api/v1/books/top-rated?limit=100", None)),
+        "GET /books/price-range": (1, lambda i: (
+            "GET", f"/api/v1/books/price-range?min={10 + i % 40}&max={15 + i % 40}&limit=100", None)),
+        "GET /books/search": (1, lambda i: (
+            "GET", f"/api/v1/books/search?title={WORDS[i % len(WORDS)]}&limit=20", None)),
+        "GET /books/autocomplete": (1, lambda i: (
+            "GET", f"/api/v1/books/autocomplete?prefix={WORDS[i % len(WORDS)][:2]}", None)),
+        "GET /books/export": (0.02, lambda i: ("GET", "/api/v1/books/export", None)),
+        "GET /categories": (1, lambda i: ("GET", "/api/v1/categories", None)),
+        "POST /books": (1, lambda i: ("POST", "/api/v1/books", new_book(size * 10 + i))),
+        "POST /books/batch": (0.2, lambda i: (
+            "POST", "/api/v1/books/batch", [new_book(size * 20 + i * 25 + n) for n in range(25)])),
+        "GET /stats/overview": (1, lambda i: ("GET", "/api/v1/stats/overview", None)),
+        "GET /stats/categories": (1, lambda i: ("GET", "/api/v1/stats/categories", None)),
+        "GET /stats/query": (1, lambda i: (
+            "GET", f"/api/v1/stats/query?metric=p90&group_by=category&min_price={i % 50}", None)),
+        "GET /ml/features": (1, lambda i: ("GET", "/api/v1/ml/features", None)),
+        "POST /ml/predictions": (1, lambda i: (
+            "POST", "/api/v1/ml/predictions", {'book_title': ml_titles[i % len(ml_titles)]})),
+        "POST /ml/predictions/batch": (0.2, lambda i: (
+            "POST", "/api/v1/ml/predictions/batch",
+            {'book_titles': [ml_titles[(i + n) % len(ml_titles)] for n in range(100)]})),
+        "POST /users/create": (1, lambda i: (
+            "POST", f"/api/v1/users/create?username=bench{size}_{i}&email=bench{i}%40example.com&password=x",
+            None)),
+        "GET /users/list/{username}": (1, lambda i: (
+            "GET", f"/api/v1/users/list/{BENCH_USER['username']}", None)),
+        "GET /auth/status": (1, lambda i: ("GET", "/api/v1/auth/status", None)),
+        "POST /auth/login": (1, lambda i: (
+            "POST", "/api/v1/auth/login", {'username': BENCH_USER['username'], 'password': BENCH_USER['password']})),
+        "GET /health": (1, lambda i: ("GET", "/api/v1/health", None)),
+    }
+
+
+def percentile(sorted_values, q):
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+async def measure(client, build, headers, semaphore, requests, offset):
+    """Dispara `requests` requisições concorrentes e mede vazão e latências"""
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        method, path, body = build(offset + i)
+        async with semaphore:
+            sent = time.perf_counter()
+            response = await client.request(method, path, json=body, headers=headers)
+            latencies.append(time.perf_counter() - sent)
+        if response.status_code >= 400:
+            errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "errors": errors,
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+async def drive(size, total, concurrency, latency, rounds):
+    import httpx
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from memory_dynamodb import MemoryDynamoDB
+    from app.main import app
+    from app.core import auth
+    from app.internal import state
+    from app.routers import ml, users
+
+    db = MemoryDynamoDB()
+    state.repository.table = db.create_table(
+        'Books', latency=latency, indexes={state.repository.category_index: ('category', 'rating')},
+        items=synthetic_books(size)
+    )
+    auth.users_table = db.create_table('users', latency=latency, items=[BENCH_USER])
+    # o router de users usa a tabela "admin" (app/internal/database.py)
+    users.table = db.create_table('admin', latency=latency, items=[dict(BENCH_USER, id='bench')])
+    state.stats_store.table = db.create_table('BookStats', latency=latency)
+
+    started = time.perf_counter()
+    state.catalog.reload()
+    load_seconds = time.perf_counter() - started
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        login = await client.post("/api/v1/auth/login", json={'username': 'bench', 'password': 'bench'})
+        login.raise_for_status()
+        headers = {'Authorization': f"Bearer {login.json()['access_token']}"}
+        semaphore = asyncio.Semaphore(concurrency)
+        ml_titles = ml.BOOK_COLUMNS.titles[:50] or ["A Light in the Attic"]
+
+        results = {}
+        for name, (share, build) in scenarios(size, ml_titles).items():
+            requests = max(5, int(total * share))
+            # uma requisição de aquecimento (constrói índices preguiçosos)
+            method, path, body = build(10 ** 6)
+            await client.request(method, path, json=body, headers=headers)
+            runs = [
+                await measure(client, build, headers, semaphore, requests, offset=round_number * requests)
+                for round_number in range(rounds)
+            ]
+            # a melhor rodada de cada métrica reduz o ruído de agendamento da máquina
+            results[name] = {
+                "requests": requests,
+                "errors": sum(run["errors"] for run in runs),
+                "rps": max(run["rps"] for run in runs),
+                "p50_ms": min(run["p50_ms"] for run in runs),
+                "p99_ms": min(run["p99_ms"] for run in runs),
+            }
+    return {"catalog_load_seconds": round(load_seconds, 3), "endpoints": results}
+
+
+def run_size(size, args):
+    env = dict(os.environ, AWS_DEFAULT_REGION="us-east-2")
+    command = [
+        sys.executable, os.path.abspath(__file__), "--child", str(size),
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--latency", str(args.latency),
+        "--rounds", str(args.rounds),
+    ]
+    output = subprocess.run(command, env=env, cwd=ROOT, capture_output=True, text=True)
+    if output.returncode != 0:
+        sys.stderr.write(output.stderr)
+        raise SystemExit(f"Benchmark com {size} livros falhou")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, threshold, p99_threshold, min_delta_ms):
+    """
+    Lista de regressões em relação à baseline.
+
+    Vazão e p50 usam `threshold`; o p99 é bem mais ruidoso com poucas
+    centenas de requisições e tem limite próprio. Diferenças de latência
+    abaixo de `min_delta_ms` são ignoradas.
+    """
+    regressions = []
+    for size, run in results.items():
+        base_run = baseline.get(size)
+        if not base_run:
+            continue
+        for name, current in run["endpoints"].items():
+            base = base_run["endpoints"].get(name)
+            if not base:
+                continue
+            if current["rps"] < base["rps"] * (1 - threshold):
+                regressions.append(f"{size} livros, {name}: vazão {current['rps']} < {base['rps']} req/s")
+            for key, limit in (("p50_ms", threshold), ("p99_ms", p99_threshold)):
+                if current[key] > base[key] * (1 + limit) and current[key] - base[key] > min_delta_ms:
+                    regressions.append(f"{size} livros, {name}: {key[:3]} {current[key]} > {base[key]} ms")
+    return regressions
+
+
+def print_report(size, run):
+    print(f"\n{size} livros (carga do catálogo: {run['catalog_load_seconds']}s)")
+    print(f"  {'endpoint':<26} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'erros':>6}")
+    for name, stats in run["endpoints"].items():
+        print(f"  {name:<26} {stats['rps']:>10} {stats['p50_ms']:>10} {stats['p99_ms']:>10} {stats['errors']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000", help="tamanhos de catálogo separados por vírgula")
+    parser.add_argument("--requests", type=int, default=200, help="requisições por endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0, help="latência simulada por chamada ao DynamoDB (s)")
+    parser.add_argument("--rounds", type=int, default=3, help="rodadas por endpoint; vale a melhor")
+    parser.add_argument("--baseline", help="arquivo JSON de baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="grava o resultado como nova baseline")
+    parser.add_argument("--threshold", type=float, default=0.3, help="piora relativa tolerada (0.3 = 30%%)")
+    parser.add_argument("--p99-threshold", type=float, default=2.0, help="piora relativa tolerada no p99")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0,
+                        help="diferença absoluta mínima de p99 para contar como regressão")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(asyncio.run(drive(args.child, args.requests, args.concurrency, args.latency, args.rounds))))
+        return
+
+    results = {}
+    for size in [int(s) for s in args.sizes.split(",")]:
+        results[str(size)] = run_size(size, args)
+        print_report(size, results[str(size)])
+
+    errors = [
+        f"{size} livros, {name}: {stats['errors']} erros"
+        for size, run in results.items() for name, stats in run["endpoints"].items() if stats["errors"]
+    ]
+    regressions = []
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline gravada em {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.p99_threshold, args.min_delta_ms)
+
+    for problem in errors + regressions:
+        print(f"FALHA: {problem}")
+    if errors or regressions:
+        sys.exit(1)
+    if args.baseline and not args.save_baseline:
+        print(f"\nSem regressões acima de {args.threshold:.0%} em relação a {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Mede memória e latência do índice de autocomplete com um catálogo sintético.
+
+Uso:
+    python benchmarks/autocomplete_footprint.py --titles 1000000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.internal.search_index import TitlePrefixIndex
+
+WORDS = [
+    "the", "light", "attic", "velvet", "secret", "garden", "night", "river", "king", "queen",
+    "dream", "journey", "shadow", "history", "love", "war", "peace", "house", "city", "ocean",
+    "silent", "lost", "golden", "winter", "summer", "black", "white", "little", "great", "last",
+]
+
+
+def synthetic_books(count, seed=42):
+    rng = random.Random(seed)
+    for book_id in range(1, count + 1):
+        title = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title()
+        yield {"id": book_id, "title": f"{title} {book_id}", "rating": rng.randint(1, 5)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--titles", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args()
+
+    books = list(synthetic_books(args.titles))
+
+    started = time.perf_counter()
+    index = TitlePrefixIndex(books)
+    build_seconds = time.perf_counter() - started
+
+    footprint = index.memory_footprint()
+    print(f"Títulos indexados: {footprint['titles']}")
+    print(f"Tempo de construção: {build_seconds:.2f}s")
+    print(f"Memória do índice: {footprint['total_bytes'] / 1024 / 1024:.1f} MB "
+          f"({footprint['bytes_per_title']} bytes/título)")
+
+    rng = random.Random(7)
+    for length in (1, 2, 3, 5, 8):
+        prefixes = []
+        for _ in range(args.queries):
+            title = books[rng.randrange(len(books))]["title"]
+            prefixes.append(title[:length])
+        started = time.perf_counter()
+        for prefix in prefixes:
+            index.complete(prefix, 10)
+        per_query = (time.perf_counter() - started) / len(prefixes)
+        print(f"Prefixo com {length} caracteres: {per_query * 1e6:.1f} µs/consulta")
+
+
+if __name__ == "__main__":
+    main()
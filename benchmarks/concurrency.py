@@ -0,0 +1,110 @@
+"""
+Compara a vazão por worker dos endpoints de livros com e sem o executor
+dedicado às chamadas do boto3.
+
+A tabela Books é substituída por uma tabela em memória que dorme `--latency`
+segundos por chamada, simulando o round-trip ao DynamoDB. Cada modo roda em
+um processo separado porque DYNAMODB_MAX_WORKERS é lido na importação.
+
+Uso:
+    python benchmarks/concurrency.py --requests 500 --concurrency 50 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class SlowTable:
+    """Tabela em memória com latência fixa por chamada"""
+
+    name = 'Books'
+
+    def __init__(self, size, latency):
+        self.latency = latency
+        self.items = {
+            i: {'id': i, 'title': f'Book {i}', 'price': 10, 'rating': i % 5 + 1,
+                'availability': 'In stock', 'category': 'Fiction'}
+            for i in range(1, size + 1)
+        }
+
+    def get_item(self, Key, **kwargs):
+        time.sleep(self.latency)
+        item = self.items.get(Key['id'])
+        return {'Item': item} if item else {}
+
+    def scan(self, **kwargs):
+        time.sleep(self.latency)
+        return {'Items': list(self.items.values())}
+
+
+async def drive(total, concurrency, latency):
+    import httpx
+    from fastapi import FastAPI
+    from app.internal import state
+    from app.routers import books
+
+    table = SlowTable(1000, latency)
+    state.repository.table = table
+    state.repository.scan_segments = 1
+    app = FastAPI()
+    app.include_router(books.router)
+
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(i):
+            async with semaphore:
+                response = await client.get(f"/api/v1/books/{i % 1000 + 1}")
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+    return {"requests": total, "seconds": round(elapsed, 3), "rps": round(total / elapsed, 1)}
+
+
+def run_mode(workers, args):
+    env = dict(os.environ, DYNAMODB_MAX_WORKERS=str(workers), AWS_DEFAULT_REGION="us-east-2")
+    command = [
+        sys.executable, __file__, "--child",
+        "--requests", str(args.requests),
+        "--concurrency", str(args.concurrency),
+        "--latency", str(args.latency),
+    ]
+    output = subprocess.run(command, env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--workers", type=int, default=32)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.path.insert(0, ROOT)
+        import logging
+        logging.disable(logging.CRITICAL)
+        print(json.dumps(asyncio.run(drive(args.requests, args.concurrency, args.latency))))
+        return
+
+    before = run_mode(0, args)
+    after = run_mode(args.workers, args)
+    print(f"GET /api/v1/books/{{id}}: {args.requests} requisições, concorrência {args.concurrency}, "
+          f"latência simulada {args.latency * 1000:.0f} ms")
+    print(f"  boto3 no event loop:       {before['rps']:>8} req/s ({before['seconds']}s)")
+    print(f"  executor com {args.workers:>3} threads:  {after['rps']:>8} req/s ({after['seconds']}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+DynamoDB em memória para os benchmarks.
+
+Implementa o subconjunto da API de Table/client do boto3 usado pela
+aplicação (get/put/update, Scan segmentado e paginado, Query no GSI de categoria,
+BatchGetItem/BatchWriteItem, ProjectionExpression e as condições de
+boto3.dynamodb.conditions), com latência opcional por chamada para simular
+o round-trip de rede. Não substitui o DynamoDB Local em testes de
+compatibilidade; serve para medir a aplicação sem depender de rede.
+"""
+
+import re
+import threading
+import time
+import zlib
+from bisect import bisect_right
+from botocore.exceptions import ClientError
+
+PAGE_SIZE = 1000
+
+_SIMPLE_FILTER_RE = re.compile(r"^\s*(\w+)\s*=\s*(:\w+)\s*$")
+_UPDATE_CLAUSE_RE = re.compile(r"\b(ADD|SET)\s+")
+
+
+def _error(code, message, operation):
+    return ClientError({'Error': {'Code': code, 'Message': message}}, operation)
+
+
+def _evaluate(condition, item):
+    """Avalia uma condição de boto3.dynamodb.conditions contra um item"""
+    expression = condition.get_expression()
+    operator, values = expression['operator'], expression['values']
+    if operator == 'AND':
+        return all(_evaluate(value, item) for value in values)
+    if operator == 'OR':
+        return any(_evaluate(value, item) for value in values)
+    if operator == 'NOT':
+        return not _evaluate(values[0], item)
+    name = values[0].name
+    if operator == 'attribute_exists':
+        return name in item
+    if operator == 'attribute_not_exists':
+        return name not in item
+    if name not in item:
+        return False
+    current = item[name]
+    if operator == '=':
+        return current == values[1]
+    if operator == '<>':
+        return current != values[1]
+    if operator == '<':
+        return current < values[1]
+    if operator == '<=':
+        return current <= values[1]
+    if operator == '>':
+        return current > values[1]
+    if operator == '>=':
+        return current >= values[1]
+    if operator == 'BETWEEN':
+        return values[1] <= current <= values[2]
+    if operator == 'IN':
+        return current in values[1]
+    if operator == 'begins_with':
+        return current.startswith(values[1])
+    if operator == 'contains':
+        return values[1] in current
+    raise NotImplementedError(f"Operador não suportado: {operator}")
+
+
+def _matches(filter_expression, values, item):
+    if filter_expression is None:
+        return True
+    if isinstance(filter_expression, str):
+        # formato usado por app.core.auth: "username = :username"
+        match = _SIMPLE_FILTER_RE.match(filter_expression)
+        if not match:
+            raise NotImplementedError(f"FilterExpression não suportada: {filter_expression}")
+        return item.get(match.group(1)) == values[match.group(2)]
+    return _evaluate(filter_expression, item)
+
+
+def _project(item, projection, names):
+    if not projection:
+        return dict(item)
+    fields = [names.get(field.strip(), field.strip()) for field in projection.split(',')]
+    return {field: item[field] for field in fields if field in item}
+
+
+class MemoryTable:
+    """Tabela com chave de partição `key` e GSIs (partition, sort) opcionais"""
+
+    def __init__(self, name, key='id', indexes=None, latency=0.0, items=()):
+        self.name = name
+        self.key = key
+        self.indexes = indexes or {}
+        self.latency = latency
+        self.items = {}
+        self._sorted_keys = None
+        self._lock = threading.Lock()
+        self.meta = type('Meta', (), {})()
+        self.meta.client = None
+        for item in items:
+            self.items[item[key]] = item
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _keys(self):
+        keys = self._sorted_keys
+        if keys is None:
+            with self._lock:
+                keys = self._sorted_keys = sorted(self.items)
+        return keys
+
+    def _store(self, item):
+        with self._lock:
+            if item[self.key] not in self.items:
+                self._sorted_keys = None
+            self.items[item[self.key]] = item
+
+    def get_item(self, Key, ProjectionExpression=None, ExpressionAttributeNames=None):
+        self._wait()
+        item = self.items.get(Key[self.key])
+        if item is None:
+            return {}
+        return {'Item': _project(item, ProjectionExpression, ExpressionAttributeNames or {})}
+
+    def update_item(self, Key, UpdateExpression, ExpressionAttributeNames=None,
+                    ExpressionAttributeValues=None, ConditionExpression=None):
+        """Suporta `ADD #a :v, ...` e `SET #a = :v, ...` com ConditionExpression de boto3"""
+        self._wait()
+        names = ExpressionAttributeNames or {}
+        values = ExpressionAttributeValues or {}
+        with self._lock:
+            current = self.items.get(Key[self.key])
+            item = dict(current) if current else dict(Key)
+            if ConditionExpression is not None and not _evaluate(ConditionExpression, current or {}):
+                raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'UpdateItem')
+            parts = _UPDATE_CLAUSE_RE.split(UpdateExpression)
+            for action, clause in zip(parts[1::2], parts[2::2]):
+                for assignment in clause.split(','):
+                    if action == 'ADD':
+                        name, value = assignment.split()
+                    else:
+                        name, value = (part.strip() for part in assignment.split('='))
+                    name = names.get(name, name)
+                    value = values[value]
+                    item[name] = item.get(name, 0) + value if action == 'ADD' else value
+            if current is None:
+                self._sorted_keys = None
+            self.items[Key[self.key]] = item
+        return {}
+
+    def put_item(self, Item, ConditionExpression=None):
+        self._wait()
+        if ConditionExpression is not None and not isinstance(ConditionExpression, str):
+            if not _evaluate(ConditionExpression, self.items.get(Item[self.key], {})):
+                raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'PutItem')
+        elif ConditionExpression == f'attribute_not_exists({self.key})' and Item[self.key] in self.items:
+            raise _error('ConditionalCheckFailedException', 'The conditional request failed', 'PutItem')
+        self._store(dict(Item))
+        return {}
+
+    def scan(self, Segment=None, TotalSegments=None, ExclusiveStartKey=None, Limit=None,
+             FilterExpression=None, ExpressionAttributeValues=None,
+             ProjectionExpression=None, ExpressionAttributeNames=None):
+        self._wait()
+        keys = self._keys()
+        start = bisect_right(keys, ExclusiveStartKey[self.key]) if ExclusiveStartKey else 0
+        limit = Limit or PAGE_SIZE
+        items, evaluated, position = [], 0, start
+        while position < len(keys) and evaluated < limit:
+            key = keys[position]
+            position += 1
+            if Segment is not None and zlib.crc32(str(key).encode()) % TotalSegments != Segment:
+                continue
+            evaluated += 1
+            item = self.items[key]
+            if _matches(FilterExpression, ExpressionAttributeValues, item):
+                items.append(_project(item, ProjectionExpression, ExpressionAttributeNames or {}))
+        response = {'Items': items, 'Count': len(items), 'ScannedCount': evaluated}
+        if position < len(keys):
+            response['LastEvaluatedKey'] = {self.key: keys[position - 1]}
+        return response
+
+    def query(self, KeyConditionExpression, IndexName=None, FilterExpression=None,
+              ExclusiveStartKey=None, Limit=None, ProjectionExpression=None,
+              ExpressionAttributeNames=None, ExpressionAttributeValues=None):
+        self._wait()
+        if IndexName is not None and IndexName not in self.indexes:
+            raise _error('ValidationException', 'The table does not have the specified index', 'Query')
+        partition, sort = self.indexes.get(IndexName, (self.key, None))
+        matches = [item for item in self.items.values() if _evaluate(KeyConditionExpression, item)]
+        matches.sort(key=lambda item: (item.get(sort, 0) if sort else 0, item[self.key]))
+        if ExclusiveStartKey:
+            last = (ExclusiveStartKey.get(sort, 0) if sort else 0, ExclusiveStartKey[self.key])
+            matches = [item for item in matches if (item.get(sort, 0) if sort else 0, item[self.key]) > last]
+        limit = Limit or PAGE_SIZE
+        page = matches[:limit]
+        items = [
+            _project(item, ProjectionExpression, ExpressionAttributeNames or {})
+            for item in page if _matches(FilterExpression, ExpressionAttributeValues, item)
+        ]
+        response = {'Items': items, 'Count': len(items)}
+        if len(matches) > limit:
+            last = page[-1]
+            response['LastEvaluatedKey'] = {
+                key: last[key] for key in (self.key, partition, sort) if key and key in last
+            }
+        return response
+
+
+class MemoryClient:
+    """Equivalente ao `table.meta.client`, despachando pelo nome da tabela"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    def scan(self, TableName, **kwargs):
+        return self.tables[TableName].scan(**kwargs)
+
+    def query(self, TableName, **kwargs):
+        return self.tables[TableName].query(**kwargs)
+
+    def batch_write_item(self, RequestItems):
+        for name, requests in RequestItems.items():
+            table = self.tables[name]
+            table._wait()
+            for request in requests:
+                table._store(dict(request['PutRequest']['Item']))
+        return {'UnprocessedItems': {}}
+
+    def batch_get_item(self, RequestItems):
+        responses = {}
+        for name, request in RequestItems.items():
+            table = self.tables[name]
+            table._wait()
+            names = request.get('ExpressionAttributeNames', {})
+            responses[name] = [
+                _project(table.items[key[table.key]], request.get('ProjectionExpression'), names)
+                for key in request['Keys'] if key[table.key] in table.items
+            ]
+        return {'Responses': responses, 'UnprocessedKeys': {}}
+
+
+class MemoryDynamoDB:
+    """Conjunto de tabelas em memória que compartilham um client"""
+
+    def __init__(self):
+        self.tables = {}
+        self.client = MemoryClient(self.tables)
+
+    def create_table(self, name, **kwargs):
+        table = MemoryTable(name, **kwargs)
+        table.meta.client = self.client
+        self.tables[name] = table
+        return table
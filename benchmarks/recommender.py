@@ -0,0 +1,109 @@
+"""
+Mede treino e consulta do modelo de recomendação com catálogos sintéticos.
+
+Para cada tamanho, monta as colunas do catálogo, codifica as features
+(FeatureEncoder), calcula a tabela de top-k com `cell_top_k` e mede a
+consulta de um livro (`Recommender.recommend`) e de um lote
+(`Recommender.recommend_many`). Até `--brute-max` livros também roda a
+busca por força bruta em blocos (`rating_aware_top_k`) e confere que as
+distâncias dos vizinhos escolhidos são as mesmas.
+
+Uso:
+    python benchmarks/recommender.py --sizes 1000,10000,100000,1000000
+    python benchmarks/recommender.py --sizes 1000,10000 --brute-max 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.internal.book_columns import BookColumns
+from app.internal.features import FeatureEncoder
+from app.internal.recommender import Recommender, cell_top_k, rating_aware_top_k
+from app.internal.training_data import get_category_groups
+
+RATINGS = ["One", "Two", "Three", "Four", "Five"]
+
+
+def synthetic_books(count, seed=42):
+    rng = random.Random(seed)
+    categories = list(get_category_groups())
+    for book_id in range(1, count + 1):
+        yield {
+            "id": book_id,
+            "title": f"Book {book_id}",
+            "price": f"£{rng.uniform(10, 60):.2f}",
+            "rating": rng.choice(RATINGS),
+            "availability": "In stock" if rng.random() < 0.9 else "Out of stock",
+            "category": rng.choice(categories),
+        }
+
+
+def neighbor_distances(features, top_k):
+    """Distância ao quadrado de cada linha até cada vizinho (inf onde não há vizinho)"""
+    neighbors = features[np.maximum(top_k, 0)]
+    distances = ((neighbors - features[:, None, :]) ** 2).sum(axis=2)
+    return np.where(top_k >= 0, distances, np.inf)
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def run(size, args):
+    columns, build_seconds = timed(lambda: BookColumns(synthetic_books(size)))
+    encoder = FeatureEncoder(get_category_groups()).fit(columns)
+    (features, valid), encode_seconds = timed(encoder.encode, columns)
+    top_k, train_seconds = timed(cell_top_k, features, columns.ratings, valid, encoder.continuous_column)
+    model = Recommender(encoder, columns.ids, features, valid, top_k)
+
+    print(f"\n{size} livros ({features.shape[1]} features)")
+    print(f"  colunas do catálogo: {build_seconds:.2f}s")
+    print(f"  codificação:         {encode_seconds:.2f}s")
+    print(f"  top-k (cell_top_k):  {train_seconds:.2f}s")
+    print(f"  livros sem top-{top_k.shape[1]} completo: {int((top_k < 0).any(axis=1).sum())}")
+
+    if size <= args.brute_max:
+        brute, brute_seconds = timed(rating_aware_top_k, features, columns.ratings, valid)
+        same = np.allclose(
+            neighbor_distances(features, top_k), neighbor_distances(features, brute), atol=1e-9
+        )
+        print(f"  top-k (força bruta): {brute_seconds:.2f}s, mesmas distâncias: {'sim' if same else 'NÃO'}")
+
+    rng = np.random.default_rng(7)
+    ids = columns.ids[rng.integers(0, size, args.queries)]
+    started = time.perf_counter()
+    for book_id in ids.tolist():
+        model.recommend(book_id)
+    per_query = (time.perf_counter() - started) / len(ids)
+    print(f"  consulta unitária:   {per_query * 1e6:.1f} µs/livro")
+
+    batch = columns.ids[rng.integers(0, size, args.batch)]
+    _, batch_seconds = timed(model.recommend_many, batch)
+    print(f"  consulta em lote:    {batch_seconds * 1e3:.1f} ms para {len(batch)} livros "
+          f"({batch_seconds / len(batch) * 1e6:.2f} µs/livro)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--brute-max", type=int, default=10000,
+                        help="maior catálogo em que a força bruta (O(n²)) também é medida")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+
+    for size in (int(value) for value in args.sizes.split(",")):
+        run(size, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compara a serialização de respostas grandes com itens do DynamoDB.
+
+- atual: jsonable_encoder + JSONResponse (caminho padrão do FastAPI)
+- rápido: app.core.responses.dumps (orjson com Decimal, ou json como fallback)
+
+Uso:
+    python benchmarks/serialization.py --items 10000 --repeat 20
+"""
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+from decimal import Decimal
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.core import responses
+
+CATEGORIES = ["Poetry", "Fiction", "Mystery", "History", "Travel", "Romance", "Science Fiction"]
+
+
+def dynamodb_items(count, seed=42):
+    rng = random.Random(seed)
+    return [
+        {
+            'id': Decimal(i),
+            'title': f"Book title number {i} with a few words",
+            'price': Decimal(f"{rng.uniform(10, 60):.2f}"),
+            'rating': Decimal(rng.randint(1, 5)),
+            'availability': 'In stock',
+            'category': rng.choice(CATEGORIES),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def measure(label, func, repeat):
+    func()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body = func()
+    per_call = (time.perf_counter() - started) / repeat
+    print(f"{label:<38} {per_call * 1000:8.2f} ms   {len(body) / 1024:8.1f} KB")
+    return per_call
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    items = dynamodb_items(args.items)
+    print(f"{args.items} itens, orjson {'instalado' if responses.orjson else 'ausente (fallback json)'}")
+
+    current = measure("jsonable_encoder + JSONResponse", lambda: JSONResponse(jsonable_encoder(items)).body, args.repeat)
+    fast = measure("responses.dumps", lambda: responses.dumps(items), args.repeat)
+    measure("responses.dumps + gzip(5)", lambda: gzip.compress(responses.dumps(items), compresslevel=5), args.repeat)
+    if responses.brotli is not None:
+        measure("responses.dumps + brotli(4)", lambda: responses.brotli.compress(responses.dumps(items), quality=4), args.repeat)
+    print(f"Ganho de serialização: {current / fast:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
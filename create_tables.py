@@ -0,0 +1,90 @@
+"""
+Cria (ou atualiza) a tabela Books e o GSI usado pelo planner de consultas,
+e a tabela BookStats com o item de estatísticas materializado.
+
+Uso:
+    python create_tables.py                                         # AWS, us-east-2
+    python create_tables.py --endpoint-url http://localhost:8001    # DynamoDB Local
+"""
+
+import argparse
+import boto3
+from botocore.exceptions import ClientError
+
+TABLE_NAME = 'Books'
+STATS_TABLE_NAME = 'BookStats'
+CATEGORY_INDEX = 'category-rating-index'
+
+ATTRIBUTE_DEFINITIONS = [
+    {'AttributeName': 'id', 'AttributeType': 'N'},
+    {'AttributeName': 'category', 'AttributeType': 'S'},
+    {'AttributeName': 'rating', 'AttributeType': 'N'},
+]
+
+CATEGORY_INDEX_SPEC = {
+    'IndexName': CATEGORY_INDEX,
+    'KeySchema': [
+        {'AttributeName': 'category', 'KeyType': 'HASH'},
+        {'AttributeName': 'rating', 'KeyType': 'RANGE'},
+    ],
+    'Projection': {'ProjectionType': 'ALL'},
+}
+
+
+def create_books_table(client):
+    try:
+        client.create_table(
+            TableName=TABLE_NAME,
+            AttributeDefinitions=ATTRIBUTE_DEFINITIONS,
+            KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+            GlobalSecondaryIndexes=[CATEGORY_INDEX_SPEC],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        client.get_waiter('table_exists').wait(TableName=TABLE_NAME)
+        print(f"Tabela {TABLE_NAME} criada com o índice {CATEGORY_INDEX}")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ResourceInUseException':
+            raise
+        add_category_index(client)
+
+
+def add_category_index(client):
+    table = client.describe_table(TableName=TABLE_NAME)['Table']
+    indexes = [gsi['IndexName'] for gsi in table.get('GlobalSecondaryIndexes', [])]
+    if CATEGORY_INDEX in indexes:
+        print(f"Tabela {TABLE_NAME} já possui o índice {CATEGORY_INDEX}")
+        return
+
+    client.update_table(
+        TableName=TABLE_NAME,
+        AttributeDefinitions=ATTRIBUTE_DEFINITIONS,
+        GlobalSecondaryIndexUpdates=[{'Create': CATEGORY_INDEX_SPEC}]
+    )
+    print(f"Índice {CATEGORY_INDEX} em criação na tabela {TABLE_NAME} (backfill em andamento)")
+
+
+def create_stats_table(client):
+    try:
+        client.create_table(
+            TableName=STATS_TABLE_NAME,
+            AttributeDefinitions=[{'AttributeName': 'id', 'AttributeType': 'S'}],
+            KeySchema=[{'AttributeName': 'id', 'KeyType': 'HASH'}],
+            BillingMode='PAY_PER_REQUEST'
+        )
+        client.get_waiter('table_exists').wait(TableName=STATS_TABLE_NAME)
+        print(f"Tabela {STATS_TABLE_NAME} criada")
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ResourceInUseException':
+            raise
+        print(f"Tabela {STATS_TABLE_NAME} já existe")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--region', default='us-east-2')
+    parser.add_argument('--endpoint-url', default=None)
+    args = parser.parse_args()
+
+    dynamodb_client = boto3.client('dynamodb', region_name=args.region, endpoint_url=args.endpoint_url)
+    create_books_table(dynamodb_client)
+    create_stats_table(dynamodb_client)
@@ -1,8 +1,140 @@
 import boto3
 import csv
 import json
+import math
+from datetime import datetime, timezone
 from io import StringIO
 from decimal import Decimal
+from boto3.dynamodb.conditions import Attr
+
+# Same item layout as app/internal/stats_store.py (StatsStore). The Lambda is
+# deployed as this single file (see LAMBDA_TESTING_GUIDE.md), so it cannot
+# import the app package: the ADD and min/max updates below mirror
+# StatsStore.record and StatsStore._update_bound and must be kept in sync.
+STATS_TABLE = 'BookStats'
+STATS_ITEM_ID = 'catalog'
+
+
+def number(value):
+    return Decimal(str(round(value, 6)))
+
+
+class CatalogAggregator:
+    """
+    Aggregates of the books inserted by this run.
+
+    Keeps count, total and sum of squares (overall and per category) plus the
+    per-category min/max, and adds them to the materialized stats item read by
+    the API with the same ADD update used by StatsStore.record. Books already
+    in the table are not counted again; percentiles are refreshed by the API's
+    reconciliation after a catalog reload.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.sum_squares = 0.0
+        self.prices = {}
+
+    def add(self, item):
+        price = float(item['price'])
+        self.count += 1
+        self.total += price
+        self.sum_squares += price * price
+        self.prices.setdefault(item['category'], []).append(price)
+
+    def _category_totals(self):
+        for category, prices in self.prices.items():
+            yield category, (
+                ('count', len(prices)),
+                ('total', number(math.fsum(prices))),
+                ('sumsq', number(math.fsum(p * p for p in prices))),
+            )
+
+    def to_item(self):
+        """
+        Stats item holding only this run's aggregates, for a table without one.
+
+        reconciled_at is 0 so the API rewrites it (with percentiles and any
+        book that was already in the table) on its next catalog reload.
+        """
+        item = {
+            'id': STATS_ITEM_ID,
+            'version': 1,
+            'reconciled_at': 0,
+            'updated_at': datetime.now(timezone.utc).isoformat(),
+            'book_count': self.count,
+            'price_total': number(self.total),
+            'price_sum_squares': number(self.sum_squares),
+        }
+        for category, totals in self._category_totals():
+            for metric, value in totals:
+                item[f'{metric}|{category}'] = value
+            item[f'min|{category}'] = number(min(self.prices[category]))
+            item[f'max|{category}'] = number(max(self.prices[category]))
+        return item
+
+    def update(self, stats_table):
+        """
+        Add the aggregates to the stats item, creating it if it does not exist.
+
+        Returns 'added', 'created' or None when nothing was inserted.
+        """
+        if not self.count:
+            return None
+        if not self._add(stats_table):
+            try:
+                stats_table.put_item(Item=self.to_item(), ConditionExpression=Attr('id').not_exists())
+                return 'created'
+            except stats_table.meta.client.exceptions.ConditionalCheckFailedException:
+                # created concurrently (API reconciliation or another run): add to it
+                self._add(stats_table)
+
+        for category, prices in self.prices.items():
+            self._update_bound(stats_table, f'min|{category}', min(prices), lower=True)
+            self._update_bound(stats_table, f'max|{category}', max(prices), lower=False)
+        return 'added'
+
+    def _add(self, stats_table):
+        names = {'#count': 'book_count', '#total': 'price_total', '#sumsq': 'price_sum_squares',
+                 '#version': 'version', '#updated': 'updated_at'}
+        values = {
+            ':count': self.count, ':total': number(self.total), ':sumsq': number(self.sum_squares),
+            ':one': 1, ':updated': datetime.now(timezone.utc).isoformat(),
+        }
+        adds = ['#count :count', '#total :total', '#sumsq :sumsq', '#version :one']
+        for n, (category, totals) in enumerate(self._category_totals()):
+            for metric, value in totals:
+                names[f'#{metric}{n}'] = f'{metric}|{category}'
+                values[f':{metric}{n}'] = value
+                adds.append(f'#{metric}{n} :{metric}{n}')
+        try:
+            stats_table.update_item(
+                Key={'id': STATS_ITEM_ID},
+                UpdateExpression='ADD ' + ', '.join(adds) + ' SET #updated = :updated',
+                ConditionExpression=Attr('id').exists(),
+                ExpressionAttributeNames=names,
+                ExpressionAttributeValues=values
+            )
+        except stats_table.meta.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    @staticmethod
+    def _update_bound(stats_table, attribute, price, lower):
+        condition = Attr(attribute).not_exists() | (
+            Attr(attribute).gt(number(price)) if lower else Attr(attribute).lt(number(price))
+        )
+        try:
+            stats_table.update_item(
+                Key={'id': STATS_ITEM_ID},
+                UpdateExpression='SET #bound = :price',
+                ConditionExpression=condition,
+                ExpressionAttributeNames={'#bound': attribute},
+                ExpressionAttributeValues={':price': number(price)}
+            )
+        except stats_table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
 
 def lambda_handler(event, context):
     """
@@ -18,6 +150,7 @@ def lambda_handler(event, context):
     try:
         dynamodb = boto3.resource('dynamodb', region_name='us-east-2')
         table = dynamodb.Table('books')
+        stats_table = dynamodb.Table(STATS_TABLE)
         
         bucket = event.get('bucket')
         file_key = event.get('file')
@@ -40,6 +173,7 @@ def lambda_handler(event, context):
         loaded_count = 0
         skipped_count = 0
         errors = []
+        aggregates = CatalogAggregator()
         
         for row_num, row in enumerate(csv_reader, 1):
             try:
@@ -63,6 +197,7 @@ def lambda_handler(event, context):
                 )
                 
                 loaded_count += 1
+                aggregates.add(item)
                 print(f"Loaded row {row_num}: {item['title']}")
                 
             except table.meta.client.exceptions.ConditionalCheckFailedException:
@@ -73,13 +208,19 @@ def lambda_handler(event, context):
                 errors.append(f"Row {row_num}: {str(e)}")
                 print(f"Error row {row_num}: {str(e)}")
         
+        # only the inserted books are added: books created through the API stay counted
+        stats_result = aggregates.update(stats_table)
+        if stats_result:
+            print(f"Stats item {stats_result}: {aggregates.count} books, {len(aggregates.prices)} categories")
+        
         return {
             'statusCode': 200,
             'body': json.dumps({
                 'message': 'Processing completed',
                 'loaded': loaded_count,
                 'skipped': skipped_count,
-                'errors': len(errors)
+                'errors': len(errors),
+                'stats_books': aggregates.count
             })
         }
         
@@ -0,0 +1,119 @@
+"""
+Testes do planner de BooksRepository contra o DynamoDB em memória dos benchmarks.
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import sys
+from decimal import Decimal
+
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.internal.books_repository import CATEGORY_INDEX, BooksRepository
+from benchmarks.memory_dynamodb import MemoryDynamoDB
+
+BOOKS = [
+    {'id': 1, 'title': 'A Light in the Attic', 'price': Decimal('51.77'), 'rating': 3, 'category': 'Poetry'},
+    {'id': 2, 'title': "Shakespeare's Sonnets", 'price': Decimal('20.66'), 'rating': 4, 'category': 'Poetry'},
+    {'id': 3, 'title': 'Sharp Objects', 'price': Decimal('47.82'), 'rating': 4, 'category': 'Mystery'},
+    {'id': 4, 'title': 'The Black Maria', 'price': Decimal('52.15'), 'rating': 1, 'category': 'Poetry'},
+    {'id': 5, 'title': 'In a Dark, Dark Wood', 'price': Decimal('19.63'), 'rating': 1, 'category': 'Mystery'},
+]
+
+
+class RecordingTable:
+    """Repassa as chamadas para a tabela em memória, registrando as operações usadas"""
+
+    def __init__(self, table):
+        self._table = table
+        self.calls = []
+
+    def __getattr__(self, name):
+        return getattr(self._table, name)
+
+    def query(self, **kwargs):
+        self.calls.append(('query', kwargs.get('IndexName')))
+        return self._table.query(**kwargs)
+
+    def scan(self, **kwargs):
+        self.calls.append(('scan', None))
+        return self._table.scan(**kwargs)
+
+
+def make_repository(with_index=True, **kwargs):
+    indexes = {CATEGORY_INDEX: ('category', 'rating')} if with_index else {}
+    table = MemoryDynamoDB().create_table('Books', indexes=indexes, items=[dict(b) for b in BOOKS])
+    return BooksRepository(RecordingTable(table), scan_segments=1, **kwargs)
+
+
+def ids(books):
+    return sorted(book['id'] for book in books)
+
+
+def test_plan_uses_category_index_when_category_is_given():
+    plan = make_repository().plan(category='Poetry', min_rating=3)
+    assert plan.operation == 'query'
+    assert plan.params['IndexName'] == CATEGORY_INDEX
+    assert 'FilterExpression' not in plan.params
+
+
+def test_plan_scans_without_category():
+    plan = make_repository().plan(min_rating=3, title='Sharp')
+    assert plan.operation == 'scan'
+    assert 'IndexName' not in plan.params
+    assert 'FilterExpression' in plan.params
+
+
+def test_find_by_category_queries_the_index():
+    repository = make_repository()
+    assert ids(repository.find(category='Poetry')) == [1, 2, 4]
+    assert ids(repository.find(category='Poetry', min_rating=3)) == [1, 2]
+    assert ids(repository.find(category='Mystery', title='Sharp')) == [3]
+    assert repository.table.calls == [('query', CATEGORY_INDEX)] * 3
+
+
+def test_find_without_category_scans():
+    repository = make_repository()
+    assert ids(repository.find(min_rating=4)) == [2, 3]
+    assert ids(repository.find(title='Dark')) == [5]
+    assert all(operation == 'scan' for operation, _ in repository.table.calls)
+
+
+def test_find_projects_requested_fields():
+    books = make_repository().find(category='Mystery', fields=['title'])
+    assert all(set(book) <= {'id', 'title'} for book in books)
+
+
+def test_find_falls_back_to_scan_when_index_is_missing():
+    repository = make_repository(with_index=False)
+    assert ids(repository.find(category='Poetry', min_rating=3)) == [1, 2]
+    assert repository.table.calls[0] == ('query', CATEGORY_INDEX)
+    assert repository.table.calls[1:] and all(op == 'scan' for op, _ in repository.table.calls[1:])
+
+    # enquanto o intervalo de nova tentativa não passa, o planner vai direto para o Scan
+    repository.table.calls.clear()
+    assert ids(repository.find(category='Mystery')) == [3, 5]
+    assert repository.plan(category='Mystery').operation == 'scan'
+    assert all(operation == 'scan' for operation, _ in repository.table.calls)
+
+
+def test_missing_index_is_probed_again_after_retry_interval():
+    repository = make_repository(with_index=False, index_retry_seconds=0)
+    assert ids(repository.find(category='Poetry')) == [1, 2, 4]
+
+    # índice criado depois: a próxima busca volta a usar o Query
+    repository.table._table.indexes[CATEGORY_INDEX] = ('category', 'rating')
+    repository.table.calls.clear()
+    assert ids(repository.find(category='Poetry')) == [1, 2, 4]
+    assert repository.table.calls == [('query', CATEGORY_INDEX)]
+
+
+def test_other_query_errors_are_raised():
+    repository = make_repository()
+    repository.table.query = lambda **kwargs: (_ for _ in ()).throw(RuntimeError("falha"))
+    with pytest.raises(RuntimeError):
+        repository.find(category='Poetry')
@@ -0,0 +1,103 @@
+"""
+Testes do top-k por células (`cell_top_k`) contra a busca por força bruta
+(`rating_aware_top_k`), em catálogos pequenos com empates e linhas inválidas.
+
+Uso:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.internal.book_columns import BookColumns
+from app.internal.features import FeatureEncoder
+from app.internal.recommender import MAX_RATING_DIFF, cell_top_k, rating_aware_top_k
+
+
+def random_catalog(rng, count, groups=4):
+    """Features no layout do FeatureEncoder (one-hot, preço, rating, disponibilidade)"""
+    ratings = rng.integers(1, 6, count)
+    features = np.zeros((count, groups + 3))
+    features[np.arange(count), rng.integers(0, groups, count)] = 1.0
+    # poucos preços distintos para forçar empates de distância
+    features[:, -3] = rng.integers(0, 8, count) / 7
+    features[:, -2] = (ratings - 1) / 4
+    features[:, -1] = rng.random(count) < 0.8
+    valid = rng.random(count) < 0.9
+    return features, ratings, valid
+
+
+def neighbor_distances(features, top_k):
+    """Distância ao quadrado de cada linha até cada vizinho (inf onde não há vizinho)"""
+    neighbors = features[np.maximum(top_k, 0)]
+    distances = ((neighbors - features[:, None, :]) ** 2).sum(axis=2)
+    return np.where(top_k >= 0, distances, np.inf)
+
+
+def assert_same_neighbors(features, ratings, valid, continuous_column, k):
+    cells = cell_top_k(features, ratings, valid, continuous_column, k=k)
+    brute = rating_aware_top_k(features, ratings, valid, k=k)
+    np.testing.assert_allclose(
+        neighbor_distances(features, cells), neighbor_distances(features, brute), atol=1e-9
+    )
+
+    rows = np.arange(len(features))[:, None]
+    found = cells >= 0
+    neighbors = np.maximum(cells, 0)
+    assert not found[~valid].any()
+    assert valid[neighbors][found].all()
+    assert (neighbors != rows)[found].all()
+    assert (np.abs(ratings[neighbors] - ratings[:, None]) <= MAX_RATING_DIFF)[found].all()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_cell_top_k_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    features, ratings, valid = random_catalog(rng, int(rng.integers(2, 120)))
+    assert_same_neighbors(features, ratings, valid, continuous_column=-3, k=5)
+
+
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_cell_top_k_matches_brute_force_for_any_k(k):
+    features, ratings, valid = random_catalog(np.random.default_rng(k), 80)
+    assert_same_neighbors(features, ratings, valid, continuous_column=-3, k=k)
+
+
+def test_cell_top_k_with_duplicated_rows():
+    # linhas idênticas: todas as distâncias empatam em zero dentro da célula
+    features, ratings, valid = random_catalog(np.random.default_rng(0), 10)
+    features, ratings, valid = np.tile(features, (4, 1)), np.tile(ratings, 4), np.tile(valid, 4)
+    assert_same_neighbors(features, ratings, valid, continuous_column=-3, k=5)
+
+
+def test_cell_top_k_without_enough_valid_rows():
+    features, ratings, _ = random_catalog(np.random.default_rng(1), 6)
+    valid = np.zeros(6, dtype=bool)
+    valid[2] = True
+    assert (cell_top_k(features, ratings, valid, -3) == -1).all()
+    assert (rating_aware_top_k(features, ratings, valid) == -1).all()
+
+
+def test_cell_top_k_on_encoded_catalog():
+    rng = np.random.default_rng(3)
+    categories = ["Poetry", "Mystery", "Travel", "Unknown"]
+    books = [
+        {
+            "id": book_id,
+            "title": f"Book {book_id}",
+            "price": f"£{rng.choice([10, 12.5, 20, 20, 35]):.2f}",
+            "rating": ["One", "Two", "Three", "Four", "Five"][rng.integers(0, 5)],
+            "availability": "In stock" if rng.random() < 0.8 else "Out of stock",
+            "category": categories[rng.integers(0, len(categories))],
+        }
+        for book_id in range(1, 151)
+    ]
+    columns = BookColumns(books)
+    encoder = FeatureEncoder({"Poetry": "Literature", "Mystery": "Fiction", "Travel": "Nonfiction"}).fit(columns)
+    features, valid = encoder.encode(columns)
+    assert_same_neighbors(features, columns.ratings, valid, encoder.continuous_column, k=5)